@@ -1,33 +1,58 @@
 import os
 from dotenv import load_dotenv
 from langchain.agents import initialize_agent, Tool
-from langchain.memory import ConversationBufferMemory
+from langchain_core.callbacks import BaseCallbackHandler
 from langchain_groq import ChatGroq
 import image_pipeline
-from langchain_utils import make_conv_chain 
+import request_context
+from langchain_utils import make_conv_chain, SessionBufferMemory
+from planner_agent import PlannerAgent
 
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise RuntimeError("Missing GROQ_API_KEY in environment (.env)")
 
+# "react": LangChain zero-shot ReAct loop. "plan": one planning call, tools run
+# concurrently, at most one synthesis call; falls back to ReAct on a bad plan.
+AGENT_MODE = os.getenv("AGENT_MODE", "react").lower()
+AGENT_MAX_STEPS = int(os.getenv("AGENT_MAX_STEPS", "3"))
+
 def describe_image(prompt: str) -> str:
     # Describes the latest image with a short caption.
-    if image_pipeline.last_image is None:
+    img = image_pipeline.last_image
+    if img is None:
         return "No image was uploaded."
-    return image_pipeline.image_blurb(image_pipeline.last_image, prompt or "Describe this image.")
+    return request_context.memoized(
+        "caption", id(img), lambda: image_pipeline.image_blurb(img, prompt or "Describe this image.")
+    )
 
 def detect_color(_: str) -> str:
     # Returns the dominant color of the last uploaded image.
-    if image_pipeline.last_image is None:
+    img = image_pipeline.last_image
+    if img is None:
         return "No image was uploaded."
-    return image_pipeline.get_dominant_color(image_pipeline.last_image)
+    return request_context.memoized("color", id(img), lambda: image_pipeline.get_dominant_color(img))
 
 
 _conv_chain = make_conv_chain()
 
-def rag_answer(query: str) -> str:
-    return _conv_chain.predict(question=query)
+def rag_answer(query: str, key: str | None = None) -> str:
+    # Memoized per request on the normalized question. app.py passes the key of
+    # the user's question with its enriched prompt, so an agent tool call on that
+    # same question reuses the answer while sub-questions get their own.
+    return request_context.memoized(
+        "rag", key or request_context.question_key(query), lambda: _conv_chain.predict(question=query)
+    )
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    # Counts agent LLM round trips against the current request.
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        request_context.count("llm_calls")
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        request_context.count("llm_calls")
 
 tools = [
     Tool(name="DescribeImage", func=describe_image,
@@ -39,8 +64,14 @@ tools = [
 ]
 
 
-llm = ChatGroq(api_key=GROQ_API_KEY, model_name="llama3-70b-8192", temperature=0)
-memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
+llm = ChatGroq(
+    api_key=GROQ_API_KEY,
+    model_name="llama3-70b-8192",
+    temperature=0,
+    base_url=os.getenv("GROQ_API_BASE"),
+    callbacks=[LLMCallCounter()],
+)
+memory = SessionBufferMemory(namespace="agent", memory_key="chat_history", input_key="input", output_key="output")
 
 prefix = (
     "You are a helpful shopping assistant. "
@@ -50,7 +81,7 @@ prefix = (
     "call DetectColor. Otherwise use RAGAnswer. Keep replies concise."
 )
 
-agent = initialize_agent(
+react_agent = initialize_agent(
     tools=tools,
     llm=llm,
     agent="zero-shot-react-description",
@@ -59,3 +90,10 @@ agent = initialize_agent(
     handle_parsing_errors=True,     
     agent_kwargs={"prefix": prefix},
 )
+
+if AGENT_MODE == "plan":
+    agent = PlannerAgent(
+        llm, tools, fallback=react_agent, memory=memory, max_steps=AGENT_MAX_STEPS, instructions=prefix
+    )
+else:
+    agent = react_agent
@@ -1,9 +1,11 @@
 import os
 import re
+import json
+import uuid
 from typing import Dict, Any, Tuple
 
 from dotenv import load_dotenv
-from flask import Flask, request, jsonify, session, send_from_directory
+from flask import Flask, Response, request, jsonify, session, send_from_directory, stream_with_context
 from PIL import Image
 
 os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
@@ -12,8 +14,12 @@ load_dotenv()
 FORCE_AGENT_FOR_IMAGE = os.environ.get("FORCE_AGENT_FOR_IMAGE", "false").lower() in {"1", "true", "yes"}
 
 import image_pipeline 
+import request_context
+import tracing
+import batch
+from memory_store import set_session_id
 from agent import agent, rag_answer
-from enrichment import extract_asin, scrape_amazon_asin, find_asin_via_search, enrich_from_free_text
+from enrichment import extract_asin, scrape_amazon_asin, find_asin_via_search, enrich_from_free_text, context_line
 
 app = Flask(
     __name__,
@@ -25,6 +31,14 @@ if not secret_key:
     raise RuntimeError("Missing FLASK_SECRET_KEY environment variable")
 app.secret_key = secret_key
 
+@app.before_request
+def _bind_session_memory():
+    # Conversation memory is keyed by the signed Flask session cookie
+    sid = session.get("sid")
+    if not sid:
+        sid = session["sid"] = uuid.uuid4().hex
+    set_session_id(sid)
+
 @app.route("/", methods=["GET"])
 def serve_frontend():
     return send_from_directory(app.static_folder, "index.html")
@@ -79,6 +93,11 @@ def _is_price_question(q: str) -> bool:
     return _any(q, PRICE_QUESTION_KEYWORDS)
 
 
+def _enrich(*texts) -> Dict[str, Any]:
+    # Memoized per request: the agent and the price retries often re-ask the same text.
+    joined = " ".join([t for t in texts if t])
+    return request_context.memoized("enrichment", _tidy(joined).lower(), lambda: enrich_from_free_text(joined))
+
 def _maybe_enrich_from_strings(*texts) -> Tuple[str, Dict[str, Any]]:
     """
     Enhanced enrichment:
@@ -88,15 +107,11 @@ def _maybe_enrich_from_strings(*texts) -> Tuple[str, Dict[str, Any]]:
       - caches last_asin
     """
     joined = " ".join([t for t in texts if t])
-    meta = enrich_from_free_text(joined)  
+    meta = _enrich(joined)  
     if meta.get("asin"):
         session["last_asin"] = meta["asin"]
 
-    parts = []
-    if meta.get("asin"): parts.append(f"asin: {meta['asin']}")
-    if meta.get("title"): parts.append(f"title: {meta['title']}")
-    if meta.get("price"): parts.append(f"price: {meta['price']}")
-    ctx = f"Context from product page: {'; '.join(parts)}. " if parts else ""
+    ctx = context_line(meta)
     if ctx:
         print(f"[enrichment] {ctx}")
     return ctx, meta
@@ -112,13 +127,24 @@ def _price_line(meta: Dict[str, Any]) -> str | None:
 
 def _build_seed_from_image(pil_img: Image.Image) -> Dict[str, Any]:
     out = {"brand": None, "caption": None, "color": None, "seed_text": None}
-    brand = image_pipeline.detect_brand_via_ocr(pil_img)
-    caption = image_pipeline.image_blurb(pil_img, "") or ""
+    brand = request_context.memoized("ocr", id(pil_img), lambda: image_pipeline.detect_brand_via_ocr(pil_img))
+    caption = request_context.memoized("caption", id(pil_img), lambda: image_pipeline.image_blurb(pil_img, "")) or ""
     out["brand"] = brand
     out["caption"] = caption
     out["seed_text"] = " ".join((f"{brand} {caption}".strip() if brand else (caption or "this product")).split()[:20])
     return out
 
+def _image_rag_prompt(enrich_ctx: str, user_q: str, img: Dict[str, Any]) -> str:
+    return (
+        f"{enrich_ctx}"
+        f"User question: {user_q}\n"
+        f"Image hints: brand={img.get('brand')}, caption=\"{img.get('caption')}\".\n"
+        "Answer succinctly and include sentiment from reviews if relevant."
+    )
+
+def _text_rag_prompt(enrich_ctx: str, user_q: str) -> str:
+    return f"{enrich_ctx}User question: {user_q}\nUse reviews to answer reliably and concisely."
+
 
 def _gather_signals(user_q: str, last_img: Image.Image | None) -> Dict[str, Any]:
     signals: Dict[str, Any] = {
@@ -136,7 +162,9 @@ def _gather_signals(user_q: str, last_img: Image.Image | None) -> Dict[str, Any]
 
         if _contains_term(user_q, "color") or _contains_term(user_q, "colour"):
             try:
-                img["color"] = image_pipeline.get_dominant_color(last_img)
+                img["color"] = request_context.memoized(
+                    "color", id(last_img), lambda: image_pipeline.get_dominant_color(last_img)
+                )
             except Exception as e:
                 print(f"[image] color error: {e}")
 
@@ -144,19 +172,16 @@ def _gather_signals(user_q: str, last_img: Image.Image | None) -> Dict[str, Any]
         signals["enrichment"] = {"ctx": enrich_ctx, "meta": meta}
 
         try:
-            rag_prompt = (
-                f"{enrich_ctx}"
-                f"User question: {user_q}\n"
-                f"Image hints: brand={img.get('brand')}, caption=\"{img.get('caption')}\".\n"
-                "Answer succinctly and include sentiment from reviews if relevant."
-            )
-            signals["rag"] = rag_answer(rag_prompt)
+            rag_prompt = _image_rag_prompt(enrich_ctx, user_q, img)
+            with tracing.span("rag"):
+                signals["rag"] = rag_answer(rag_prompt, key=request_context.question_key(user_q))
         except Exception as e:
             print(f"[rag] error: {e}")
 
         try:
             agent_q = (enrich_ctx + user_q) if enrich_ctx else user_q
-            agent_out = agent.invoke({"input": agent_q})
+            with tracing.span("agent"):
+                agent_out = agent.invoke({"input": agent_q})
             signals["agent"] = (
                 (agent_out or {}).get("output")
                 or (agent_out or {}).get("text")
@@ -172,12 +197,14 @@ def _gather_signals(user_q: str, last_img: Image.Image | None) -> Dict[str, Any]
         signals["enrichment"] = {"ctx": enrich_ctx, "meta": meta}
 
         try:
-            signals["rag"] = rag_answer(f"{enrich_ctx}User question: {user_q}\nUse reviews to answer reliably and concisely.")
+            with tracing.span("rag"):
+                signals["rag"] = rag_answer(_text_rag_prompt(enrich_ctx, user_q), key=request_context.question_key(user_q))
         except Exception as e:
             print(f"[rag] error: {e}")
 
         try:
-            agent_out = agent.invoke({"input": (enrich_ctx + user_q) if enrich_ctx else user_q})
+            with tracing.span("agent"):
+                agent_out = agent.invoke({"input": (enrich_ctx + user_q) if enrich_ctx else user_q})
             signals["agent"] = (
                 (agent_out or {}).get("output")
                 or (agent_out or {}).get("text")
@@ -203,14 +230,14 @@ def _compose_answer(signals: Dict[str, Any]) -> str:
         if price_line:
             return price_line
 
-        retry_meta = enrich_from_free_text(" ".join([
+        retry_meta = _enrich(" ".join([
             agent_txt, img.get("seed_text") or "", rag_txt
         ]))
         price_line = _price_line(retry_meta)
         if price_line:
             return price_line
 
-        retry_meta2 = enrich_from_free_text(" ".join([img.get("seed_text") or "", q]))
+        retry_meta2 = _enrich(" ".join([img.get("seed_text") or "", q]))
         price_line = _price_line(retry_meta2)
         if price_line:
             return price_line
@@ -277,7 +304,19 @@ def _short_addendum(primary: str, extra: str) -> str | None:
 @app.route("/upload_and_query", methods=["POST"])
 def upload_and_query():
     user_q = (request.form.get("query") or "").strip()
+    ctx_token = request_context.begin(user_q)
+    ctx = request_context.current()
+    try:
+        with tracing.span("request"):
+            resp = _upload_and_query(user_q)
+        resp.headers["Server-Timing"] = tracing.server_timing(ctx.timings)
+        return resp
+    finally:
+        tracing.add_counts(ctx.counters)
+        request_context.end(ctx_token)
 
+
+def _upload_and_query(user_q: str):
     img_file = request.files.get("image")
     if img_file:
         try:
@@ -312,6 +351,65 @@ def upload_and_query():
     })
 
 
+def _prepare_batch_item(user_q: str, img: Image.Image | None) -> Tuple[Dict[str, Any], str]:
+    # Same signals as _gather_signals minus the agent, which is per-conversation.
+    signals: Dict[str, Any] = {
+        "user_q": user_q,
+        "has_image": img is not None,
+        "image": {},
+        "enrichment": {"ctx": "", "meta": {}},
+        "rag": "",
+        "agent": "",
+    }
+    if img is not None:
+        seed = _build_seed_from_image(img)
+        if _contains_term(user_q, "color") or _contains_term(user_q, "colour"):
+            seed["color"] = request_context.memoized("color", id(img), lambda: image_pipeline.get_dominant_color(img))
+        signals["image"] = seed
+        meta = _enrich(user_q, seed.get("seed_text"))
+        enrich_ctx = context_line(meta)
+        prompt = _image_rag_prompt(enrich_ctx, user_q, seed)
+    else:
+        meta = _enrich(user_q)
+        enrich_ctx = context_line(meta)
+        prompt = _text_rag_prompt(enrich_ctx, user_q)
+    signals["enrichment"] = {"ctx": enrich_ctx, "meta": meta}
+    return signals, prompt
+
+
+@app.route("/batch_query", methods=["POST"])
+def batch_query():
+    """
+    Multipart batch: `images` (repeated) with matching `queries` (repeated), or
+    one `query` for every image; `queries` without images are text questions.
+    Streams one JSON line per item as it finishes.
+    """
+    images = request.files.getlist("images")
+    queries = request.form.getlist("queries")
+    default_q = (request.form.get("query") or "What is this?").strip()
+
+    # uploads stay as file streams; batch decodes them a chunk at a time
+    items = [
+        {
+            "id": str(i),
+            "query": (queries[i] if i < len(queries) else default_q).strip(),
+            "image": images[i].stream if i < len(images) else None,
+        }
+        for i in range(max(len(images), len(queries)))
+    ]
+
+    def lines():
+        for res in batch.process_items(items, _prepare_batch_item, _compose_answer):
+            yield json.dumps(res, ensure_ascii=False) + "\n"
+
+    return Response(stream_with_context(lines()), mimetype="application/x-ndjson")
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(tracing.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
     app.run(host="0.0.0.0", port=port, debug=(os.environ.get("FLASK_ENV") != "production"), use_reloader=False)
@@ -0,0 +1,221 @@
+import os
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from PIL import Image
+
+import image_pipeline
+import request_context
+from llm_wrapper import embed_queries, rag_query
+
+# Batch catalog processing. Items flow through in chunks: captions for a chunk
+# run as one batched forward pass, OCR/enrichment spread over a worker pool,
+# query embeddings are computed per chunk, and RAG synthesis runs on the pool
+# with results yielded as each item finishes. One RequestContext spans the
+# whole job, so repeated photos, product lookups and prompts are computed once.
+
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "8"))
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+
+Prepare = Callable[[str, Any], Tuple[Dict[str, Any], str]]
+Compose = Callable[[Dict[str, Any]], str]
+
+
+def _chunks(items: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _load_image(item: Dict[str, Any]):
+    # a path (CLI manifest) or an uploaded file stream (/batch_query)
+    img = item.get("image")
+    if isinstance(img, str) or hasattr(img, "read"):
+        try:
+            img = Image.open(img).convert("RGB")
+        except Exception as e:
+            raise ValueError(f"could not read image: {e}") from e
+    return img
+
+
+def _digest(img: Image.Image) -> str:
+    return hashlib.sha1(img.tobytes() + repr(img.size).encode()).hexdigest()
+
+
+def _caption_chunk(job: request_context.RequestContext, captions: Dict[str, str],
+                   images: List[Image.Image], batch_size: int) -> None:
+    """Caption unseen photos in one batched pass and prime the job's caption memo."""
+    digests = [_digest(img) for img in images]
+    todo: Dict[str, Image.Image] = {}
+    for d, img in zip(digests, images):
+        if d not in captions:
+            todo.setdefault(d, img)
+    for d, cap in zip(todo, image_pipeline.image_blurbs(list(todo.values()), batch_size=batch_size)):
+        captions[d] = cap
+    for d, img in zip(digests, images):
+        job.prime("caption", id(img), captions[d])
+
+
+def _result(item: Dict[str, Any], signals: Dict[str, Any], answer: str) -> Dict[str, Any]:
+    img = signals.get("image") or {}
+    meta = (signals.get("enrichment") or {}).get("meta") or {}
+    return {
+        "id": item.get("id"),
+        "query": item.get("query", ""),
+        "answer": answer,
+        "brand": img.get("brand"),
+        "caption": img.get("caption"),
+        "color": img.get("color"),
+        "asin": meta.get("asin"),
+        "title": meta.get("title"),
+        "price": meta.get("price"),
+    }
+
+
+def process_items(
+    items: Iterable[Dict[str, Any]],
+    prepare: Prepare,
+    compose: Compose,
+    batch_size: int = BATCH_SIZE,
+    workers: int = BATCH_WORKERS,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Run items ({"id", "query", "image": PIL image | path | file | None}) through the
+    pipeline and yield one result dict per item, in completion order. Images
+    are decoded a chunk at a time and released once the chunk is done.
+    `prepare(query, image)` returns (signals, rag_prompt); `compose(signals)`
+    turns the filled-in signals into the final answer.
+    """
+    job = request_context.RequestContext()
+    captions: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        def run(fn, *args):
+            return pool.submit(request_context.run_in, job, fn, *args)
+
+        def error(item, e):
+            return {"id": item.get("id"), "query": item.get("query", ""), "error": str(e)}
+
+        def release(chunk):
+            # image signals are keyed by id(); those ids can be reused by the next chunk
+            job.forget("caption", "ocr", "color")
+            for item in chunk:
+                item["image"] = None
+
+        def answer(item, signals, prompt, embedding):
+            signals["rag"] = job.memoize("rag", prompt, lambda: rag_query(prompt, embedding, item.get("query")))
+            return _result(item, signals, compose(signals))
+
+        for chunk in _chunks(items, batch_size):
+            ready = []
+            for item, fut in [(it, pool.submit(_load_image, it)) for it in chunk]:
+                try:
+                    item["image"] = fut.result()
+                    ready.append(item)
+                except Exception as e:
+                    yield error(item, e)
+
+            images = [it["image"] for it in ready if it["image"] is not None]
+            if images:
+                request_context.run_in(job, _caption_chunk, job, captions, images, batch_size)
+
+            # OCR + enrichment per item on the pool
+            prepared = []
+            for item, fut in [(it, run(prepare, it.get("query", ""), it["image"])) for it in ready]:
+                try:
+                    prepared.append((item, *fut.result()))
+                except Exception as e:
+                    yield error(item, e)
+            if not prepared:
+                release(chunk)
+                continue
+
+            embeddings = request_context.run_in(job, embed_queries, [prompt for _, _, prompt in prepared])
+            futures = {
+                run(answer, item, signals, prompt, emb): item
+                for (item, signals, prompt), emb in zip(prepared, embeddings)
+            }
+            for fut in as_completed(futures):
+                try:
+                    yield fut.result()
+                except Exception as e:
+                    yield error(futures[fut], e)
+
+            release(chunk)
+
+
+def _manifest_items(path: str) -> Iterator[Dict[str, Any]]:
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding="utf-8") as f:
+        for n, line in enumerate(f):
+            if not line.strip():
+                continue
+            rec = json.loads(line)
+            img = rec.get("image")
+            yield {
+                "id": str(rec.get("id", n)),
+                "query": rec.get("query", ""),
+                "image": os.path.join(base, img) if img else None,
+            }
+
+
+def _dir_items(path: str, query: str) -> Iterator[Dict[str, Any]]:
+    for name in sorted(os.listdir(path)):
+        if name.lower().endswith((".jpg", ".jpeg", ".png", ".webp", ".bmp")):
+            yield {"id": name, "query": query, "image": os.path.join(path, name)}
+
+
+def _done_ids(out_path: str) -> set:
+    done = set()
+    if os.path.isfile(out_path):
+        with open(out_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue  # partial last line from an interrupted run
+                if "error" not in rec:
+                    done.add(str(rec.get("id")))
+    return done
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Run a catalog batch job; re-run the same command to resume.")
+    ap.add_argument("source", help="JSONL manifest ({id, image, query} per line) or a directory of images")
+    ap.add_argument("--query", default="What is this?", help="question for every image in directory mode")
+    ap.add_argument("--out", required=True, help="JSONL results file (appended to)")
+    ap.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    ap.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    args = ap.parse_args()
+
+    from app import _prepare_batch_item, _compose_answer
+
+    source = _dir_items(args.source, args.query) if os.path.isdir(args.source) else _manifest_items(args.source)
+    done = _done_ids(args.out)
+    if done:
+        print(f"[batch] resuming: {len(done)} items already in {args.out}")
+    todo = (it for it in source if it["id"] not in done)
+
+    t0 = time.perf_counter()
+    n = errors = 0
+    with open(args.out, "a", encoding="utf-8") as out:
+        for res in process_items(todo, _prepare_batch_item, _compose_answer, args.batch_size, args.workers):
+            out.write(json.dumps(res, ensure_ascii=False) + "\n")
+            out.flush()
+            n += 1
+            errors += "error" in res
+            if n % 25 == 0:
+                print(f"[batch] {n} items, {errors} errors, {60 * n / (time.perf_counter() - t0):.1f} items/min")
+    print(f"[batch] done: {n} items, {errors} errors in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+import re
+import gzip
+import json
+import math
+import heapq
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_ASIN_RE = re.compile(r"\bB0[A-Z0-9]{8}\b")
+_MODEL_RE = re.compile(r"\b(?=[A-Za-z\-]*\d)(?=[\d\-]*[A-Za-z])[A-Za-z0-9\-]{3,}\b")
+# letter+digit words that are descriptors, not identifiers: 3rd, 2-in-1, 4-pack, 12oz, 1080p
+_GENERIC_RE = re.compile(
+    r"\d+(?:st|nd|rd|th|-in-\d+|-?(?:pack|pk|pcs?|piece|inch|in|ft|oz|lbs?|mm|cm|ml|mah|gb|tb|mp|hz|k|p|w|v|x))",
+    re.IGNORECASE,
+)
+
+_STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i if in into is it its me my of on or our so
+that the their them then there these they this to was we were what when which who will with
+you your do does did not no can just than too very
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall((text or "").lower()) if t not in _STOPWORDS]
+
+
+def is_token_heavy(query: str) -> bool:
+    """
+    True when the query is dominated by identifiers that dense retrieval
+    handles poorly: ASINs or model numbers (letters mixed with digits, minus
+    ordinals, counts and units).
+    """
+    if _ASIN_RE.search(query or ""):
+        return True
+    return any(not _GENERIC_RE.fullmatch(m) for m in _MODEL_RE.findall(query or ""))
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a fixed corpus, stored as a compact inverted index:
+    per term, delta-encoded document positions and term frequencies.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_ids: List[str] = []
+        self.doc_len: List[int] = []
+        self.postings: Dict[str, Tuple[List[int], List[int]]] = {}
+        self._avgdl = 0.0
+
+    def build(self, docs: Iterable[Tuple[str, str]]) -> "BM25Index":
+        postings: Dict[str, Tuple[List[int], List[int]]] = defaultdict(lambda: ([], []))
+        for doc_id, text in docs:
+            pos = len(self.doc_ids)
+            tokens = tokenize(text)
+            self.doc_ids.append(doc_id)
+            self.doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                docs_, tfs = postings[term]
+                docs_.append(pos)
+                tfs.append(tf)
+        self.postings = dict(postings)
+        self._avgdl = sum(self.doc_len) / max(1, len(self.doc_len))
+        return self
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def search(self, query: str, k: int = 5) -> List[Tuple[str, float]]:
+        n = len(self.doc_ids)
+        if not n:
+            return []
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            post = self.postings.get(term)
+            if not post:
+                continue
+            docs_, tfs = post
+            idf = math.log(1 + (n - len(docs_) + 0.5) / (len(docs_) + 0.5))
+            for pos, tf in zip(docs_, tfs):
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[pos] / self._avgdl)
+                scores[pos] += idf * tf * (self.k1 + 1) / (tf + norm)
+        top = heapq.nlargest(k, scores.items(), key=lambda kv: kv[1])
+        return [(self.doc_ids[pos], score) for pos, score in top]
+
+    def save(self, path: str) -> None:
+        packed = {}
+        for term, (docs_, tfs) in self.postings.items():
+            deltas = [docs_[0]] + [b - a for a, b in zip(docs_, docs_[1:])]
+            packed[term] = [deltas, tfs]
+        payload = {
+            "k1": self.k1,
+            "b": self.b,
+            "doc_ids": self.doc_ids,
+            "doc_len": self.doc_len,
+            "postings": packed,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        idx = cls(k1=payload["k1"], b=payload["b"])
+        idx.doc_ids = payload["doc_ids"]
+        idx.doc_len = payload["doc_len"]
+        for term, (deltas, tfs) in payload["postings"].items():
+            docs_, acc = [], 0
+            for d in deltas:
+                acc += d
+                docs_.append(acc)
+            idx.postings[term] = (docs_, tfs)
+        idx._avgdl = sum(idx.doc_len) / max(1, len(idx.doc_len))
+        return idx
+
+
+def rrf_fuse(rankings: Iterable[List[str]], k: int = 5, rrf_k: int = 60) -> List[Tuple[str, float]]:
+    """Reciprocal-rank fusion of several ranked id lists."""
+    fused: Dict[str, float] = defaultdict(float)
+    for ranked in rankings:
+        for rank, doc_id in enumerate(ranked):
+            fused[doc_id] += 1.0 / (rrf_k + rank + 1)
+    return heapq.nlargest(k, fused.items(), key=lambda kv: kv[1])
+
+
+def review_search_text(text: str) -> str:
+    """Flatten a stored review payload to the fields worth matching lexically."""
+    try:
+        p = json.loads(text)
+    except (TypeError, ValueError):
+        return text
+    if not isinstance(p, dict):
+        return text
+    return " ".join(str(p.get(k) or "") for k in ("asin", "title", "text"))
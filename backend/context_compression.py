@@ -0,0 +1,196 @@
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from bm25_index import tokenize
+from memory_store import count_tokens
+
+# Post-retrieval context compression. Retrieved reviews are stored as JSON
+# payloads; before synthesis each one is flattened to a short header plus its
+# sentences, sentences that repeat one already kept are dropped, and the rest
+# are kept most-relevant-first until the token budget is spent. Kept sentences
+# stay in their original order. Relevance comes from the query embedding when
+# retrieval computed one, otherwise from query-term overlap, so the lexical-only
+# retrieval path never pays for a transformer pass here.
+
+COMPRESS_CONTEXT = os.environ.get("COMPRESS_CONTEXT", "true").lower() in {"1", "true", "yes"}
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "400"))
+REDUNDANCY_THRESHOLD = float(os.getenv("CONTEXT_REDUNDANCY_THRESHOLD", "0.92"))
+LEXICAL_REDUNDANCY_THRESHOLD = 0.8  # token-set Jaccard, when there are no embeddings
+MAX_SENTENCE_TOKENS = 60
+SENTENCE_CACHE_SIZE = 8192
+
+EmbedTexts = Callable[[List[str]], List[List[float]]]
+
+_SENT_SPLIT = re.compile(r"(?<=[.!?])\s+|\n+")
+
+_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def review_parts(text: str, dup_count: int = 1) -> Tuple[str, str]:
+    """
+    Split a stored review payload into (header, body); non-JSON text has no
+    header. `dup_count` comes from the node metadata written at ingestion.
+    """
+    try:
+        rec = json.loads(text)
+    except ValueError:
+        return "", text
+    if not isinstance(rec, dict):
+        return "", text
+
+    tags = [str(rec["asin"])] if rec.get("asin") else []
+    if rec.get("rating") is not None:
+        tags.append(f"{float(rec['rating']):g}/5")
+    if dup_count > 1:
+        tags.append(f"+{dup_count - 1} similar")
+    header = f"[{', '.join(tags)}]" if tags else ""
+    if rec.get("title"):
+        header = f"{header} {rec['title']}:".strip()
+    return header, str(rec.get("text") or "")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of `text`; unpunctuated runs are cut into MAX_SENTENCE_TOKENS windows."""
+    out = []
+    for sent in _SENT_SPLIT.split(text or ""):
+        piece: List[str] = []
+        chars = 0
+        for word in sent.split():
+            if piece and chars + len(word) > 4 * MAX_SENTENCE_TOKENS:  # ~4 chars per token
+                out.append(" ".join(piece))
+                piece, chars = [], 0
+            piece.append(word)
+            chars += len(word) + 1
+        if piece:
+            out.append(" ".join(piece))
+    return out
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    if count_tokens(text) <= tokens:
+        return text
+    cut = text[: max(0, 4 * tokens - 3)]
+    if " " in cut[len(cut) // 2:]:
+        cut = cut[: cut.rindex(" ")]
+    return f"{cut.rstrip()}..." if cut.strip() else ""
+
+
+def _normalize(mat: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    return mat / np.where(norms == 0, 1, norms)
+
+
+def _sentence_vectors(sentences: List[str], embed_texts: EmbedTexts) -> np.ndarray:
+    # reviews come back for many queries, so sentence vectors are LRU-cached
+    found = {}
+    with _cache_lock:
+        for s in sentences:
+            if s in _cache:
+                _cache.move_to_end(s)
+                found[s] = _cache[s]
+    missing = list(dict.fromkeys(s for s in sentences if s not in found))
+    if missing:
+        fresh = _normalize(np.asarray(embed_texts(missing), dtype=np.float32))
+        found.update(zip(missing, fresh))
+        with _cache_lock:
+            for s, v in zip(missing, fresh):
+                _cache[s] = v
+            while len(_cache) > SENTENCE_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return np.stack([found[s] for s in sentences])
+
+
+def clear_sentence_cache() -> None:
+    with _cache_lock:
+        _cache.clear()
+
+
+def _term_overlap(query_text: str, sentences: List[str]) -> Tuple[np.ndarray, List[set]]:
+    terms = set(tokenize(query_text))
+    toks = [set(tokenize(s)) for s in sentences]
+    return np.asarray([len(terms & t) / np.sqrt(len(t) + 1) for t in toks], dtype=np.float32), toks
+
+
+def compress_passages(
+    passages: List[str],
+    query_embedding: Optional[Sequence[float]] = None,
+    embed_texts: Optional[EmbedTexts] = None,
+    query_text: str = "",
+    dup_counts: Optional[List[int]] = None,
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+    redundancy_threshold: float = REDUNDANCY_THRESHOLD,
+) -> Tuple[List[Optional[str]], Dict[str, int]]:
+    """
+    Compress retrieved passages (best first) for a query. Sentences are ranked
+    by embedding similarity when `query_embedding` and `embed_texts` are given,
+    else by overlap with `query_text`. `dup_counts` (one per passage) are
+    shown in the review headers. Returns one entry per passage (None when
+    nothing from it made the budget) and token stats. The most relevant
+    sentence is always kept, truncated if it alone exceeds the budget.
+    """
+    parts = [review_parts(p, d) for p, d in zip(passages, dup_counts or [1] * len(passages))]
+    sents = [(i, s) for i, (_, body) in enumerate(parts) for s in split_sentences(body)]
+    stats = {
+        "tokens_before": sum(count_tokens(p) for p in passages),
+        "sentences": len(sents),
+        "kept": 0,
+    }
+    if not sents:
+        stats["tokens_after"] = stats["tokens_before"]
+        return list(passages), stats
+
+    texts = [s for _, s in sents]
+    if query_embedding is not None and embed_texts is not None:
+        vecs = _sentence_vectors(texts, embed_texts)
+        relevance = vecs @ _normalize(np.asarray(query_embedding, dtype=np.float32))
+
+        def similarity(kept: List[int], idx: int) -> float:
+            return float(np.max(vecs[kept] @ vecs[idx]))
+    else:
+        relevance, toks = _term_overlap(query_text, texts)
+        redundancy_threshold = LEXICAL_REDUNDANCY_THRESHOLD
+
+        def similarity(kept: List[int], idx: int) -> float:
+            return max(len(toks[k] & toks[idx]) / max(1, len(toks[k] | toks[idx])) for k in kept)
+
+    # ties go to the better-ranked passage
+    order = np.lexsort((np.asarray([i for i, _ in sents]), -relevance))
+    kept: List[int] = []
+    seen, headed = set(), set()
+    used = 0
+    for idx in order:
+        i, s = sents[idx]
+        key = " ".join(s.lower().split())
+        if key in seen or (kept and similarity(kept, idx) >= redundancy_threshold):
+            continue
+        cost = count_tokens(s) + (count_tokens(parts[i][0]) if i not in headed else 0)
+        if used + cost > token_budget:
+            continue  # a shorter, less relevant sentence may still fit
+        used += cost
+        kept.append(int(idx))
+        seen.add(key)
+        headed.add(i)
+
+    pieces = {idx: sents[idx][1] for idx in kept}
+    if not kept:
+        # nothing fit whole (e.g. one long unpunctuated review): cut the best one down
+        idx = int(order[0])
+        i, s = sents[idx]
+        header = parts[i][0] if count_tokens(parts[i][0]) < token_budget // 2 else ""
+        pieces[idx] = truncate_to_tokens(s, token_budget - count_tokens(header) - 1)
+        parts[i] = (header, parts[i][1])
+
+    out: List[Optional[str]] = []
+    for i, (header, _) in enumerate(parts):
+        body = " ".join(pieces[idx] for idx, (j, _) in enumerate(sents) if j == i and idx in pieces)
+        out.append(f"{header} {body}".strip() if body else None)
+    stats["kept"] = len(pieces)
+    stats["tokens_after"] = sum(count_tokens(t) for t in out if t)
+    return out, stats
@@ -0,0 +1,148 @@
+import re
+import json
+import hashlib
+from collections import defaultdict
+from typing import Dict, Any, List, Iterable, Tuple
+
+import numpy as np
+
+# MinHash/LSH settings: 64 permutations split into 16 bands of 4 rows
+# catches pairs with Jaccard >= ~0.5 with high probability; candidates are
+# then verified against DUP_THRESHOLD using the signature estimate.
+NUM_PERM = 64
+LSH_BANDS = 16
+SHINGLE_SIZE = 3
+DUP_THRESHOLD = 0.8
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, (1 << 32) - 1, size=NUM_PERM, dtype=np.uint64)
+_PERM_B = _rng.randint(0, (1 << 32) - 1, size=NUM_PERM, dtype=np.uint64)
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", (text or "").lower()).split())
+
+
+def _body(payload: Dict[str, Any]) -> str:
+    # templated reviews ("Great product!") repeat the body under varying
+    # titles, so the title only counts when there is no body
+    return _normalize(payload.get("text")) or _normalize(payload.get("title"))
+
+
+def exact_key(payload: Dict[str, Any]) -> str:
+    return hashlib.sha1(_body(payload).encode("utf-8")).hexdigest()
+
+
+def _shingles(text: str) -> set:
+    words = _normalize(text).split()
+    if len(words) < SHINGLE_SIZE:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> np.ndarray:
+    """Return a NUM_PERM-wide MinHash signature of the word shingles of `text`."""
+    shingles = _shingles(text)
+    if not shingles:
+        return np.full(NUM_PERM, _MAX_HASH, dtype=np.uint64)
+    hv = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles],
+        dtype=np.uint64,
+    )
+    phv = ((np.outer(hv, _PERM_A) + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+    return phv.min(axis=0)
+
+
+def _band_keys(sig: np.ndarray) -> List[Tuple[int, bytes]]:
+    rows = NUM_PERM // LSH_BANDS
+    return [(b, sig[b * rows:(b + 1) * rows].tobytes()) for b in range(LSH_BANDS)]
+
+
+def _dedup_group(payloads: List[Dict[str, Any]], threshold: float) -> Tuple[List[Dict[str, Any]], int, int]:
+    kept: List[Dict[str, Any]] = []
+    by_hash: Dict[str, Dict[str, Any]] = {}
+    buckets: Dict[Tuple[int, bytes], List[int]] = defaultdict(list)
+    sigs: List[np.ndarray] = []
+    exact = near = 0
+
+    for p in payloads:
+        key = exact_key(p)
+        rep = by_hash.get(key)
+        if rep is not None:
+            rep["dup_count"] += 1
+            exact += 1
+            continue
+
+        sig = minhash(_body(p))
+        bands = _band_keys(sig)
+        match = None
+        for bk in bands:
+            for idx in buckets.get(bk, ()):
+                if float(np.mean(sigs[idx] == sig)) >= threshold:
+                    match = idx
+                    break
+            if match is not None:
+                break
+
+        if match is not None:
+            kept[match]["dup_count"] += 1
+            by_hash[key] = kept[match]
+            near += 1
+            continue
+
+        rep = dict(p, dup_count=1)
+        by_hash[key] = rep
+        for bk in bands:
+            buckets[bk].append(len(kept))
+        kept.append(rep)
+        sigs.append(sig)
+
+    return kept, exact, near
+
+
+def dedup_reviews(payloads: Iterable[Dict[str, Any]], threshold: float = DUP_THRESHOLD) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+    """
+    Collapse exact and near-duplicate reviews within each ASIN.
+    The first review seen is kept as the representative and carries a
+    `dup_count` of how many reviews it stands for. Returns (kept, stats).
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    total = 0
+    for p in payloads:
+        groups[p.get("asin") or ""].append(p)
+        total += 1
+
+    kept: List[Dict[str, Any]] = []
+    exact = near = 0
+    for group in groups.values():
+        g_kept, g_exact, g_near = _dedup_group(group, threshold)
+        kept.extend(g_kept)
+        exact += g_exact
+        near += g_near
+
+    stats = {"input": total, "kept": len(kept), "exact_dups": exact, "near_dups": near}
+    return kept, stats
+
+
+def review_text(payload: Dict[str, Any]) -> str:
+    """Stored/embedded text of a review: its JSON payload without dup_count."""
+    return json.dumps({k: v for k, v in payload.items() if k != "dup_count"}, ensure_ascii=False)
+
+
+def review_document(payload: Dict[str, Any]):
+    """
+    llama-index Document for a (deduplicated) review payload. dup_count lives
+    in metadata only, hidden from both the embedding and the LLM text;
+    CompressedContext surfaces it in the review header.
+    """
+    from llama_index.core import Document
+
+    return Document(
+        text=review_text(payload),
+        metadata={"asin": payload["asin"], "dup_count": payload.get("dup_count", 1)},
+        excluded_embed_metadata_keys=["asin", "dup_count"],
+        excluded_llm_metadata_keys=["asin", "dup_count"],
+    )
@@ -0,0 +1,249 @@
+import os
+import argparse
+import threading
+from collections import OrderedDict
+from typing import Any, List, Tuple
+
+# One place to choose the embedding backend for both the indexer
+# (rag_setup.py) and the query path (llm_wrapper.py):
+#   EMBED_BACKEND=torch      HuggingFaceEmbedding in full-precision PyTorch (default)
+#   EMBED_BACKEND=onnx       same model exported to ONNX Runtime
+#   EMBED_BACKEND=onnx-int8  ONNX model with dynamic int8 quantization
+# EMBED_THREADS caps intra-op threads per process; by default the CPU count is
+# split across WEB_CONCURRENCY workers so gunicorn workers don't oversubscribe.
+
+EMBED_MODEL = os.getenv("EMBED_MODEL", "BAAI/bge-small-en-v1.5")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch").lower()
+EMBED_ONNX_DIR = os.getenv(
+    "EMBED_ONNX_DIR",
+    os.path.join(os.path.dirname(__file__), os.pardir, "models", EMBED_MODEL.replace("/", "--") + "-onnx"),
+)
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "2048"))
+MAX_LENGTH = 512
+
+os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+
+def default_threads() -> int:
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0")) or default_threads()
+
+
+def _instructions(model_name: str) -> Tuple[str, str]:
+    # match HuggingFaceEmbedding so ONNX vectors line up with the torch index
+    try:
+        from llama_index.embeddings.huggingface.utils import (
+            get_query_instruct_for_model_name,
+            get_text_instruct_for_model_name,
+        )
+        return get_query_instruct_for_model_name(model_name) or "", get_text_instruct_for_model_name(model_name) or ""
+    except ImportError:
+        return "", ""
+
+
+def export_onnx(model_name: str = EMBED_MODEL, out_dir: str = EMBED_ONNX_DIR, quantize: bool = True) -> str:
+    """Export `model_name` to ONNX under `out_dir` (plus an int8 copy if `quantize`)."""
+    try:
+        from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+        from optimum.onnxruntime.configuration import AutoQuantizationConfig
+        from transformers import AutoTokenizer
+    except ImportError as e:
+        raise RuntimeError("ONNX export needs `pip install optimum[onnxruntime]`") from e
+
+    os.makedirs(out_dir, exist_ok=True)
+    ORTModelForFeatureExtraction.from_pretrained(model_name, export=True).save_pretrained(out_dir)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(out_dir)
+    if quantize:
+        qconfig = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+        ORTQuantizer.from_pretrained(out_dir).quantize(save_dir=out_dir, quantization_config=qconfig)
+    return out_dir
+
+
+try:
+    from llama_index.core.base.embeddings.base import BaseEmbedding
+    from llama_index.core.bridge.pydantic import PrivateAttr
+except ImportError:  # only the export CLI is usable without llama-index
+    BaseEmbedding = object
+
+    def PrivateAttr(*args, **kwargs):
+        return None
+
+
+class OnnxEmbedding(BaseEmbedding):
+    """
+    BGE-style sentence embeddings (CLS pooling, L2-normalized) on ONNX Runtime.
+    Tokenizations and query vectors are LRU-cached, since the same seed texts
+    and questions come back repeatedly.
+    """
+
+    model_dir: str = EMBED_ONNX_DIR
+    quantized: bool = False
+    threads: int = EMBED_THREADS
+    query_instruction: str = ""
+    text_instruction: str = ""
+
+    _session: Any = PrivateAttr()
+    _tokenizer: Any = PrivateAttr()
+    _input_names: Any = PrivateAttr()
+    _tok_cache: Any = PrivateAttr()
+    _query_cache: Any = PrivateAttr()
+    _cache_lock: Any = PrivateAttr()
+
+    def __init__(self, model_name: str = EMBED_MODEL, **kwargs):
+        query_instruction, text_instruction = _instructions(model_name)
+        kwargs.setdefault("query_instruction", query_instruction)
+        kwargs.setdefault("text_instruction", text_instruction)
+        super().__init__(model_name=model_name, **kwargs)
+
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        fname = "model_quantized.onnx" if self.quantized else "model.onnx"
+        path = os.path.join(self.model_dir, fname)
+        if not os.path.isfile(path):
+            export_onnx(model_name, self.model_dir, quantize=self.quantized)
+
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = self.threads
+        opts.inter_op_num_threads = 1
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self._session = ort.InferenceSession(path, sess_options=opts, providers=["CPUExecutionProvider"])
+        self._input_names = {i.name for i in self._session.get_inputs()}
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(self.model_dir, "tokenizer.json"))
+        self._tokenizer.no_padding()
+        self._tokenizer.enable_truncation(max_length=MAX_LENGTH)
+        self._tok_cache = OrderedDict()
+        self._query_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "OnnxEmbedding"
+
+    # the server embeds from several request threads at once
+    def _lru_get(self, cache: OrderedDict, key):
+        with self._cache_lock:
+            val = cache.get(key)
+            if val is not None:
+                cache.move_to_end(key)
+            return val
+
+    def _lru_put(self, cache: OrderedDict, key, val) -> None:
+        with self._cache_lock:
+            cache[key] = val
+            if len(cache) > EMBED_CACHE_SIZE:
+                cache.popitem(last=False)
+
+    def _encode(self, text: str) -> Tuple[List[int], List[int]]:
+        enc = self._lru_get(self._tok_cache, text)
+        if enc is None:
+            e = self._tokenizer.encode(text)
+            enc = (e.ids, e.type_ids)
+            self._lru_put(self._tok_cache, text, enc)
+        return enc
+
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        import numpy as np
+
+        out: List[List[float]] = []
+        for start in range(0, len(texts), self.embed_batch_size):
+            encs = [self._encode(t) for t in texts[start:start + self.embed_batch_size]]
+            width = max(len(ids) for ids, _ in encs)
+            ids = np.zeros((len(encs), width), dtype=np.int64)
+            types = np.zeros_like(ids)
+            mask = np.zeros_like(ids)
+            for row, (tok, typ) in enumerate(encs):
+                ids[row, :len(tok)] = tok
+                types[row, :len(typ)] = typ
+                mask[row, :len(tok)] = 1
+            feeds = {"input_ids": ids, "attention_mask": mask, "token_type_ids": types}
+            hidden = self._session.run(None, {k: v for k, v in feeds.items() if k in self._input_names})[0]
+            cls = hidden[:, 0]
+            cls = cls / np.linalg.norm(cls, axis=1, keepdims=True)
+            out.extend(cls.tolist())
+        return out
+
+    def get_query_embedding_batch(self, queries: List[str]) -> List[List[float]]:
+        """Query embeddings for many queries, batching the cache misses together."""
+        keys = [f"{self.query_instruction}{q}" for q in queries]
+        vecs = [self._lru_get(self._query_cache, k) for k in keys]
+        missing = [k for k, v in zip(keys, vecs) if v is None]
+        fresh = dict(zip(missing, self._embed(missing))) if missing else {}
+        for k, v in fresh.items():
+            self._lru_put(self._query_cache, k, v)
+        return [v if v is not None else fresh[k] for k, v in zip(keys, vecs)]
+
+    def _get_query_embedding(self, query: str) -> List[float]:
+        return self.get_query_embedding_batch([query])[0]
+
+    async def _aget_query_embedding(self, query: str) -> List[float]:
+        return self._get_query_embedding(query)
+
+    def _get_text_embedding(self, text: str) -> List[float]:
+        return self._embed([f"{self.text_instruction}{text}"])[0]
+
+    def _get_text_embeddings(self, texts: List[str]) -> List[List[float]]:
+        return self._embed([f"{self.text_instruction}{t}" for t in texts])
+
+
+def _configure_torch_threads(threads: int) -> None:
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def make_embed_model(backend: str = EMBED_BACKEND, model_name: str = EMBED_MODEL, threads: int = EMBED_THREADS):
+    if backend == "torch":
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+        _configure_torch_threads(threads)
+        return HuggingFaceEmbedding(model_name)
+    if backend in ("onnx", "onnx-int8"):
+        return OnnxEmbedding(model_name, quantized=(backend == "onnx-int8"), threads=threads)
+    raise ValueError(f"Unknown EMBED_BACKEND {backend!r}; expected torch, onnx or onnx-int8")
+
+
+def query_embeddings(model, queries: List[str]) -> List[List[float]]:
+    """
+    Query vectors for many queries in one batched pass, through public
+    embedding APIs only. For HuggingFaceEmbedding the query instruction is
+    prepended and the texts go through get_text_embedding_batch, which is
+    the same encoding as get_query_embedding as long as the model has no
+    separate text instruction (true for BGE).
+    """
+    if hasattr(model, "get_query_embedding_batch"):
+        return model.get_query_embedding_batch(list(queries))
+    query_instruction, text_instruction = _instructions(getattr(model, "model_name", ""))
+    query_instruction = getattr(model, "query_instruction", None) or query_instruction
+    if getattr(model, "text_instruction", None) or text_instruction:
+        return [model.get_query_embedding(q) for q in queries]
+    return model.get_text_embedding_batch([f"{query_instruction}{q}" for q in queries])
+
+
+_embed_model = None
+
+
+def get_embed_model():
+    """Process-wide embedding model for the configured backend."""
+    global _embed_model
+    if _embed_model is None:
+        _embed_model = make_embed_model()
+    return _embed_model
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Export the embedding model to ONNX (and int8).")
+    ap.add_argument("--model", default=EMBED_MODEL)
+    ap.add_argument("--out", default=EMBED_ONNX_DIR)
+    ap.add_argument("--no-quantize", action="store_true")
+    args = ap.parse_args()
+    print(f"ONNX model written to {export_onnx(args.model, args.out, quantize=not args.no_quantize)}")
+
+
+if __name__ == "__main__":
+    main()
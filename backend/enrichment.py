@@ -1,7 +1,10 @@
+import os
 import re
 import requests
 from bs4 import BeautifulSoup
 
+from tracing import record_error, traced
+
 HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
@@ -11,6 +14,9 @@ HEADERS = {
     "Accept-Language": "en-US,en;q=0.9",
 }
 
+# Overridable so the load-test harness can replay saved pages offline
+AMAZON_BASE_URL = os.getenv("AMAZON_BASE_URL", "https://www.amazon.com").rstrip("/")
+
 ASIN_PATTERN = re.compile(r"\b([A-Z0-9]{10})\b")
 DP_ASIN_PATTERN = re.compile(r"/dp/([A-Z0-9]{10})")
 
@@ -21,9 +27,10 @@ def extract_asin(text: str | None):
     m = ASIN_PATTERN.search(text)
     return m.group(1) if m else None
 
+@traced("amazon_product")
 def scrape_amazon_asin(asin: str) -> dict:
     """Scrape Amazon product page for title & price for a given ASIN."""
-    url = f"https://www.amazon.com/dp/{asin}"
+    url = f"{AMAZON_BASE_URL}/dp/{asin}"
     resp = requests.get(url, headers=HEADERS, timeout=10)
     resp.raise_for_status()
     soup = BeautifulSoup(resp.text, "html.parser")
@@ -41,6 +48,7 @@ def scrape_amazon_asin(asin: str) -> dict:
 
     return {"asin": asin, "title": title, "price": price}
 
+@traced("amazon_search")
 def find_asin_via_search(query: str | None) -> str | None:
     """
     Try Amazon site search and return the first plausible ASIN from results.
@@ -50,7 +58,7 @@ def find_asin_via_search(query: str | None) -> str | None:
         return None
     try:
         params = {"k": query}
-        resp = requests.get("https://www.amazon.com/s", headers=HEADERS, params=params, timeout=10)
+        resp = requests.get(f"{AMAZON_BASE_URL}/s", headers=HEADERS, params=params, timeout=10)
         resp.raise_for_status()
         soup = BeautifulSoup(resp.text, "html.parser")
 
@@ -67,9 +75,11 @@ def find_asin_via_search(query: str | None) -> str | None:
             if m:
                 return m.group(1)
     except Exception as e:
+        record_error("amazon_search")
         print(f"[enrichment] find_asin_via_search error: {e}")
     return None
 
+@traced("enrichment")
 def enrich_from_free_text(*texts: str) -> dict:
     """
     Best-effort enrichment from arbitrary text:
@@ -88,5 +98,14 @@ def enrich_from_free_text(*texts: str) -> dict:
             meta.setdefault("asin", asin)
             return meta
         except Exception as e:
+            record_error("enrichment")
             print(f"[enrichment] enrich_from_free_text scrape error: {e}")
     return {}
+
+def context_line(meta: dict) -> str:
+    """Format enrichment metadata as a prompt prefix ('' when nothing was found)."""
+    parts = []
+    if meta.get("asin"): parts.append(f"asin: {meta['asin']}")
+    if meta.get("title"): parts.append(f"title: {meta['title']}")
+    if meta.get("price"): parts.append(f"price: {meta['price']}")
+    return f"Context from product page: {'; '.join(parts)}. " if parts else ""
@@ -4,6 +4,8 @@ import re
 from typing import Optional, Tuple, List
 from PIL import Image
 
+from tracing import record_error, traced
+
 
 last_image: Optional[Image.Image] = None
 _caption_pipe = None
@@ -22,11 +24,14 @@ def _load_captioner() -> None:
         _caption_err = e
 
 
+@traced("caption")
 def image_blurb(pil_img: Image.Image, prompt: str = "") -> str:
     _load_captioner()
     if _caption_err is not None:
+        record_error("caption")
         return "Image captioning is unavailable on this server."
     if _caption_pipe is None:
+        record_error("caption")
         return "Image captioner did not initialize."
 
     try:
@@ -36,9 +41,35 @@ def image_blurb(pil_img: Image.Image, prompt: str = "") -> str:
             return cap or "I see a product image."
         return "I see a product image."
     except Exception:
+        record_error("caption")
         return "Sorry, I couldn’t analyze the image."
 
 
+@traced("caption_batch")
+def image_blurbs(images: List[Image.Image], batch_size: int = 8) -> List[str]:
+    """Caption several images with batched forward passes."""
+    if not images:
+        return []
+    _load_captioner()
+    if _caption_err is not None:
+        record_error("caption_batch")
+        return ["Image captioning is unavailable on this server."] * len(images)
+    if _caption_pipe is None:
+        record_error("caption_batch")
+        return ["Image captioner did not initialize."] * len(images)
+
+    try:
+        outs = _caption_pipe(list(images), batch_size=batch_size)
+    except Exception:
+        record_error("caption_batch")
+        return ["Sorry, I couldn’t analyze the image."] * len(images)
+    caps = []
+    for out in outs:
+        cap = (out[0].get("generated_text") or "").strip() if isinstance(out, list) and out else ""
+        caps.append(cap or "I see a product image.")
+    return caps
+
+
 def _closest_css3_name(rgb: Tuple[int, int, int]) -> str:
     try:
         import webcolors  
@@ -58,6 +89,7 @@ def _closest_css3_name(rgb: Tuple[int, int, int]) -> str:
         return "#{:02x}{:02x}{:02x}".format(*rgb)
 
 
+@traced("color")
 def get_dominant_color(pil_img: Image.Image) -> str:
     try:
         img = pil_img.convert("RGB").resize((64, 64))
@@ -71,6 +103,7 @@ def get_dominant_color(pil_img: Image.Image) -> str:
         r, g, b = palette[idx * 3 : idx * 3 + 3]
         return _closest_css3_name((r, g, b))
     except Exception:
+        record_error("color")
         return "Unknown color"
 
 
@@ -120,6 +153,7 @@ def _ocr_tesseract(img: Image.Image) -> str:
         return ""
 
     texts: List[str] = []
+    failed = False
     configs = [
         "--oem 3 --psm 6 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz",
         "--oem 3 --psm 7 -c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz",
@@ -136,11 +170,14 @@ def _ocr_tesseract(img: Image.Image) -> str:
                     if os.getenv("OCR_DEBUG") == "1":
                         print(f"[ocr:{tag}] {cfg} -> {repr(txt)}")
             except Exception:
-                pass
+                failed = True
 
+    if failed:
+        record_error("ocr")  # once per image, however many variants failed
     return "\n".join(texts)
 
 
+@traced("ocr")
 def detect_brand_via_ocr(pil_img: Image.Image) -> Optional[str]:
     raw = _ocr_tesseract(pil_img)
     if not raw:
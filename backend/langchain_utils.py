@@ -1,14 +1,54 @@
+from typing import Any, Dict, List, Optional
+
 from langchain_core.prompts import PromptTemplate
 from langchain.chains import LLMChain
-from langchain.memory import ConversationBufferMemory
+from langchain_core.memory import BaseMemory
 
 from llm_wrapper import GroqLLM
+from memory_store import SessionMemoryStore, get_store, get_session_id
+
+
+class SessionBufferMemory(BaseMemory):
+    """
+    LangChain memory backed by a SessionMemoryStore, so every browser session
+    gets its own token-budgeted history instead of one shared buffer.
+    """
+
+    store: Any = None
+    namespace: str = "chain"
+    memory_key: str = "chat_history"
+    input_key: Optional[str] = None
+    output_key: Optional[str] = None
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def _sid(self) -> str:
+        return f"{self.namespace}:{get_session_id()}"
+
+    def _pick(self, values: Dict[str, Any], key: Optional[str]) -> str:
+        if key:
+            return str(values.get(key, ""))
+        rest = [v for k, v in values.items() if k != self.memory_key]
+        return str(rest[0]) if len(rest) == 1 else str(values.get("input") or values.get("question") or "")
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, str]:
+        return {self.memory_key: (self.store or get_store()).history(self._sid())}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        (self.store or get_store()).append(
+            self._sid(), self._pick(inputs, self.input_key), self._pick(outputs, self.output_key)
+        )
+
+    def clear(self) -> None:
+        (self.store or get_store()).clear(self._sid())
 
 
-def make_conv_chain():
+def make_conv_chain(store: SessionMemoryStore | None = None):
     
     llm = GroqLLM()
-    memory = ConversationBufferMemory(memory_key="chat_history")
+    memory = SessionBufferMemory(store=store, namespace="chain", memory_key="chat_history")
 
     template = """You are a helpful assistant. Use the conversation history
 and then answer the user's latest query.
@@ -1,4 +1,5 @@
 import os
+import contextvars
 from typing import Optional, List
 from dotenv import load_dotenv
 from langchain.llms.base import LLM
@@ -11,17 +12,32 @@ if not GROQ_API_KEY:
 from llama_index.core.settings import Settings         
 from llama_index.core.storage.storage_context import StorageContext
 from llama_index.core import load_index_from_storage
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from llama_index.core.retrievers import BaseRetriever
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import NodeWithScore, QueryBundle
 from llama_index.llms.groq import Groq
 
-embed_model = HuggingFaceEmbedding("BAAI/bge-small-en-v1.5")
+import request_context
+from tracing import span
+from bm25_index import BM25Index, is_token_heavy, rrf_fuse
+from embeddings import get_embed_model, query_embeddings
+from context_compression import COMPRESS_CONTEXT, compress_passages
+
+embed_model = get_embed_model()
 Settings.embed_model = embed_model
-Settings.llm = Groq(model="llama3-70b-8192", api_key=GROQ_API_KEY)
+# GROQ_API_BASE points both Groq clients at another OpenAI-compatible host
+# (e.g. the stand-in server in benchmarks/loadtest)
+GROQ_API_BASE = os.getenv("GROQ_API_BASE")
+_groq_kwargs = {"api_base": f"{GROQ_API_BASE.rstrip('/')}/openai/v1"} if GROQ_API_BASE else {}
+Settings.llm = Groq(model="llama3-70b-8192", api_key=GROQ_API_KEY, **_groq_kwargs)
 Settings.num_output = 512   
 Settings.chunk_size = 1024  
 
 # Load the persisted index
-STORAGE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, "storage"))
+STORAGE_DIR = os.path.abspath(
+    os.getenv("STORAGE_DIR") or os.path.join(os.path.dirname(__file__), os.pardir, "storage")
+)
 if not os.path.isdir(STORAGE_DIR):
     raise FileNotFoundError(
         f"No persisted index found at {STORAGE_DIR}. Run rag_setup.py first."
@@ -30,8 +46,127 @@ if not os.path.isdir(STORAGE_DIR):
 storage_ctx = StorageContext.from_defaults(persist_dir=STORAGE_DIR)
 _index = load_index_from_storage(storage_ctx)
 
+SIMILARITY_TOP_K = 5
+HYBRID_RETRIEVAL = os.environ.get("HYBRID_RETRIEVAL", "true").lower() in {"1", "true", "yes"}
+
+BM25_PATH = os.path.join(STORAGE_DIR, "bm25.json.gz")
+_bm25 = None
+if HYBRID_RETRIEVAL:
+    if os.path.isfile(BM25_PATH):
+        _bm25 = BM25Index.load(BM25_PATH)
+    else:
+        print(f"[rag] no lexical index at {BM25_PATH}; using vector retrieval only. Re-run rag_setup.py.")
+
+
+# The bare user question for the lookup in flight. The prompt that reaches
+# GroqLLM carries the chain template, chat history and enrichment context
+# (which names an ASIN), so lexical routing and BM25 run on this instead.
+_search_text: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("search_text", default=None)
+
+
+# Lexical + dense retrieval. Identifier-heavy questions (ASINs, model numbers)
+# skip the embedding entirely; everything else is fused with reciprocal rank.
+class HybridRetriever(BaseRetriever):
+    def __init__(self, index, bm25: BM25Index, top_k: int = SIMILARITY_TOP_K):
+        self._docstore = index.docstore
+        self._dense = index.as_retriever(similarity_top_k=top_k)
+        self._bm25 = bm25
+        self._top_k = top_k
+        super().__init__()
+
+    def _lexical(self, query: str):
+        out = []
+        for node_id, score in self._bm25.search(query, self._top_k):
+            node = self._docstore.get_node(node_id, raise_error=False)
+            if node is not None:
+                out.append(NodeWithScore(node=node, score=score))
+        return out
+
+    def _retrieve(self, query_bundle: QueryBundle):
+        text = _search_text.get() or query_bundle.query_str
+        lexical = self._lexical(text)
+        if lexical and is_token_heavy(text):
+            return lexical
+
+        dense = self._dense.retrieve(query_bundle)
+        nodes = {nws.node.node_id: nws.node for nws in lexical + dense}
+        fused = rrf_fuse(
+            [[nws.node.node_id for nws in lexical], [nws.node.node_id for nws in dense]],
+            k=self._top_k,
+        )
+        return [NodeWithScore(node=nodes[node_id], score=score) for node_id, score in fused]
+
+
+# Shrinks the retrieved reviews to the query-relevant, non-redundant sentences
+# within CONTEXT_TOKEN_BUDGET before they reach the synthesis prompt.
+class CompressedContext(BaseNodePostprocessor):
+    @classmethod
+    def class_name(cls) -> str:
+        return "CompressedContext"
+
+    def _postprocess_nodes(self, nodes: List[NodeWithScore], query_bundle: Optional[QueryBundle] = None):
+        if not nodes or query_bundle is None:
+            return nodes
+        # reuse the retrieval embedding; on the lexical-only path there is none,
+        # and sentences are ranked by term overlap instead of embedding them
+        with span("compression"):
+            texts, stats = compress_passages(
+                [nws.node.get_content() for nws in nodes],
+                query_embedding=query_bundle.embedding,
+                embed_texts=embed_model.get_text_embedding_batch if query_bundle.embedding else None,
+                query_text=_search_text.get() or query_bundle.query_str,
+                dup_counts=[int(nws.node.metadata.get("dup_count") or 1) for nws in nodes],
+            )
+        request_context.count("context_tokens_saved", stats["tokens_before"] - stats["tokens_after"])
+
+        out = []
+        for nws, text in zip(nodes, texts):
+            if text is not None:
+                node = nws.node.model_copy()
+                node.set_content(text)
+                out.append(NodeWithScore(node=node, score=nws.score))
+        return out
+
+
 # Building a single cached query engine
-_query_engine = _index.as_query_engine(similarity_top_k=5)
+_postprocessors = [CompressedContext()] if COMPRESS_CONTEXT else []
+if _bm25 is not None:
+    _query_engine = RetrieverQueryEngine.from_args(
+        HybridRetriever(_index, _bm25), node_postprocessors=_postprocessors
+    )
+else:
+    _query_engine = _index.as_query_engine(
+        similarity_top_k=SIMILARITY_TOP_K, node_postprocessors=_postprocessors
+    )
+
+
+def embed_queries(texts: List[str]) -> List[List[float]]:
+    """Query embeddings for a batch of prompts in one forward pass."""
+    with span("embedding"):
+        return query_embeddings(embed_model, texts)
+
+
+def rag_query(prompt: str, embedding: Optional[List[float]] = None, question: Optional[str] = None) -> str:
+    """
+    Retrieve + synthesize for one prompt, reusing a precomputed query embedding
+    if given. `question` is the bare user question for lexical search; it
+    defaults to the current request's question.
+    """
+    request_context.count("llm_calls")
+    if question is None:
+        ctx = request_context.current()
+        question = ctx.question if ctx is not None else None
+    query = QueryBundle(prompt, embedding=embedding)
+    token = _search_text.set(question or None)
+    try:
+        with span("retrieval"):
+            nodes = _query_engine.retrieve(query)
+    finally:
+        _search_text.reset(token)
+    with span("synthesis"):
+        result = _query_engine.synthesize(query, nodes)
+    return getattr(result, "response", str(result))
+
 
 # LangChain LLM wrapper that answers by querying the persisted LlamaIndex.
 class GroqLLM(LLM):
@@ -40,8 +175,8 @@ class GroqLLM(LLM):
         return "groq-index-wrapper"
 
     def _call(self, prompt: str, stop: Optional[List[str]] = None) -> str:
-        result = _query_engine.query(prompt)
-        return getattr(result, "response", str(result))
+        # retrieval + one synthesis call on the Groq model
+        return rag_query(prompt)
 
     @property
     def _identifying_params(self) -> dict:
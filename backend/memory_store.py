@@ -0,0 +1,243 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import contextvars
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Conversation memory keyed by session. Each session keeps a token-budgeted
+# window of recent turns plus a rolling summary of older ones; idle sessions
+# and, past a global token cap, least-recently-used ones are evicted.
+
+_session_id: contextvars.ContextVar[str] = contextvars.ContextVar("session_id", default="default")
+
+
+def set_session_id(sid: str) -> contextvars.Token:
+    return _session_id.set(sid)
+
+
+def get_session_id() -> str:
+    return _session_id.get()
+
+
+def count_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting Llama-3 prompts
+    return (len(text or "") + 3) // 4
+
+
+def _first_sentence(text: str, max_chars: int = 160) -> str:
+    text = " ".join((text or "").split())
+    m = re.match(r"(.+?[.!?])(\s|$)", text)
+    s = m.group(1) if m else text
+    return s if len(s) <= max_chars else s[: max_chars - 1] + "…"
+
+
+def extractive_summary(summary: str, turns: List[List[str]]) -> str:
+    """Default summarizer: first sentence of each evicted exchange."""
+    lines = [summary] if summary else []
+    for human, ai in turns:
+        lines.append(f"User asked: {_first_sentence(human)} Assistant: {_first_sentence(ai)}")
+    return "\n".join(lines)
+
+
+def _trim_left(text: str, max_tokens: int) -> str:
+    """Keep the most recent part of `text` within `max_tokens`."""
+    if count_tokens(text) <= max_tokens:
+        return text
+    lines = text.split("\n")
+    while lines and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+class InProcessBackend:
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        return self._data.get(sid)
+
+    def put(self, sid: str, state: Dict[str, Any]) -> None:
+        self._data[sid] = state
+
+    def delete(self, sid: str) -> None:
+        self._data.pop(sid, None)
+
+    def scan(self) -> Iterator[Tuple[str, int, float]]:
+        return iter(())  # nothing outlives the process
+
+
+class DiskBackend:
+    """One JSON file per session under `root`, so memory survives restarts."""
+
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, sid: str) -> str:
+        return os.path.join(self.root, hashlib.sha1(sid.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, sid: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(sid), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, sid: str, state: Dict[str, Any]) -> None:
+        tmp = self._path(sid) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            # file names are hashed, so keep the sid for scan()
+            json.dump({**state, "sid": sid}, f, ensure_ascii=False)
+        os.replace(tmp, self._path(sid))
+
+    def delete(self, sid: str) -> None:
+        try:
+            os.remove(self._path(sid))
+        except OSError:
+            pass
+
+    def scan(self) -> Iterator[Tuple[str, int, float]]:
+        """(sid, tokens, last write as wall-clock time) for every stored session."""
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    state = json.load(f)
+                mtime = os.path.getmtime(path)
+            except (OSError, ValueError):
+                continue
+            if isinstance(state, dict) and state.get("sid"):
+                yield state["sid"], int(state.get("tokens") or 0), mtime
+
+
+class SessionMemoryStore:
+    def __init__(
+        self,
+        backend=None,
+        window_tokens: int = 768,
+        summary_tokens: int = 256,
+        idle_ttl: float = 1800.0,
+        max_total_tokens: int = 2_000_000,
+        summarizer: Callable[[str, List[List[str]]], str] = extractive_summary,
+    ):
+        self.backend = backend or InProcessBackend()
+        self.window_tokens = window_tokens
+        self.summary_tokens = summary_tokens
+        self.idle_ttl = idle_ttl
+        self.max_total_tokens = max_total_tokens
+        self.summarizer = summarizer
+        self._lock = threading.Lock()
+        # sid -> tokens held, in least-recently-used order
+        self._lru: "OrderedDict[str, int]" = OrderedDict()
+        self._last_seen: Dict[str, float] = {}
+        self._total = 0
+        self._load()
+
+    def history(self, sid: str) -> str:
+        """Summary + recent turns for `sid`, already within the token budget."""
+        with self._lock:
+            state = self.backend.get(sid)
+            if state is None:
+                return ""
+            self._touch(sid, state["tokens"])
+            self._evict()
+        parts = []
+        if state["summary"]:
+            parts.append(f"Summary of earlier conversation:\n{state['summary']}")
+        parts.extend(f"Human: {h}\nAI: {a}" for h, a in state["turns"])
+        return "\n".join(parts)
+
+    def append(self, sid: str, human: str, ai: str) -> None:
+        with self._lock:
+            state = self.backend.get(sid) or {"summary": "", "turns": [], "tokens": 0}
+            state["turns"].append([human, ai])
+
+            evicted = []
+            while len(state["turns"]) > 1 and self._turn_tokens(state["turns"]) > self.window_tokens:
+                evicted.append(state["turns"].pop(0))
+            if evicted:
+                state["summary"] = _trim_left(self.summarizer(state["summary"], evicted), self.summary_tokens)
+
+            state["tokens"] = count_tokens(state["summary"]) + self._turn_tokens(state["turns"])
+            self.backend.put(sid, state)
+            self._touch(sid, state["tokens"])
+            self._evict()
+
+    def clear(self, sid: str) -> None:
+        with self._lock:
+            self._drop(sid)
+
+    def sweep(self) -> None:
+        """Evict idle and over-cap sessions without waiting for the next request."""
+        with self._lock:
+            self._evict()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"sessions": len(self._lru), "tokens": self._total}
+
+    @staticmethod
+    def _turn_tokens(turns: List[List[str]]) -> int:
+        return sum(count_tokens(h) + count_tokens(a) for h, a in turns)
+
+    def _load(self) -> None:
+        # sessions persisted by an earlier process count toward the cap and the
+        # idle TTL from their last write, oldest first
+        scan = getattr(self.backend, "scan", None)
+        if scan is None:
+            return
+        now, mono = time.time(), time.monotonic()
+        with self._lock:
+            for sid, tokens, mtime in sorted(scan(), key=lambda e: e[2]):
+                self._total += tokens - self._lru.pop(sid, 0)
+                self._lru[sid] = tokens
+                self._last_seen[sid] = mono - max(0.0, now - mtime)
+            self._evict()
+
+    def _touch(self, sid: str, tokens: int) -> None:
+        self._total += tokens - self._lru.pop(sid, 0)
+        self._lru[sid] = tokens
+        self._last_seen[sid] = time.monotonic()
+
+    def _drop(self, sid: str) -> None:
+        self._total -= self._lru.pop(sid, 0)
+        self._last_seen.pop(sid, None)
+        self.backend.delete(sid)
+
+    def _evict(self) -> None:
+        # _lru is ordered by last use, so idle sessions sit at the front
+        cutoff = time.monotonic() - self.idle_ttl
+        while self._lru:
+            sid = next(iter(self._lru))
+            if self._last_seen[sid] >= cutoff:
+                break
+            self._drop(sid)
+        while self._total > self.max_total_tokens and len(self._lru) > 1:
+            self._drop(next(iter(self._lru)))
+
+
+_store: Optional[SessionMemoryStore] = None
+
+
+def get_store() -> SessionMemoryStore:
+    """Process-wide store configured from MEMORY_* environment variables."""
+    global _store
+    if _store is None:
+        if os.getenv("MEMORY_BACKEND", "memory").lower() == "disk":
+            backend = DiskBackend(os.getenv("MEMORY_DIR", os.path.join(os.path.dirname(__file__), os.pardir, "memory")))
+        else:
+            backend = InProcessBackend()
+        _store = SessionMemoryStore(
+            backend,
+            window_tokens=int(os.getenv("MEMORY_WINDOW_TOKENS", "768")),
+            summary_tokens=int(os.getenv("MEMORY_SUMMARY_TOKENS", "256")),
+            idle_ttl=float(os.getenv("MEMORY_IDLE_TTL", "1800")),
+            max_total_tokens=int(os.getenv("MEMORY_MAX_TOTAL_TOKENS", "2000000")),
+        )
+    return _store
@@ -0,0 +1,134 @@
+import json
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+# Plan-then-execute alternative to the ReAct loop: one LLM call picks the
+# tools and their inputs, the tools run concurrently, and at most one more
+# call turns their observations into an answer. Unparseable plans are handed
+# to the fallback agent (the ReAct executor) unchanged.
+
+PLAN_TEMPLATE = """{instructions}
+
+You are planning tool calls for the assistant above.
+
+Tools:
+{tools}
+
+User request: {question}
+
+Reply with ONLY a JSON object, no prose:
+{{"steps": [{{"tool": "<tool name>", "input": "<tool input>"}}], "answer": ""}}
+Use at most {max_steps} steps. Only list tools that are needed. If no tool is
+needed, return an empty "steps" list and put the reply in "answer"."""
+
+SYNTH_TEMPLATE = """You are a helpful shopping assistant. Answer the user's request
+using the tool results below. Keep the reply concise.
+
+User request: {question}
+
+Tool results:
+{observations}
+
+Answer:"""
+
+_DECODER = json.JSONDecoder()
+
+
+def _first_json_object(text: str) -> Optional[Dict[str, Any]]:
+    # decode from each "{" in turn, ignoring anything after the object
+    start = text.find("{")
+    while start != -1:
+        try:
+            obj, _ = _DECODER.raw_decode(text, start)
+        except ValueError:
+            obj = None
+        if isinstance(obj, dict):
+            return obj
+        start = text.find("{", start + 1)
+    return None
+
+
+def _content(msg: Any) -> str:
+    return getattr(msg, "content", None) or str(msg)
+
+
+class PlannerAgent:
+    def __init__(self, llm, tools, fallback=None, memory=None, max_steps: int = 3, instructions: str = ""):
+        self.llm = llm
+        self.instructions = instructions or "You are a helpful shopping assistant."
+        self.tools = {t.name: t for t in tools}
+        self.fallback = fallback
+        self.memory = memory
+        self.max_steps = max_steps
+
+    def plan(self, question: str) -> Optional[Tuple[List[Tuple[str, str]], str]]:
+        """Return ([(tool, input), ...], direct_answer), or None if the plan is unusable."""
+        prompt = PLAN_TEMPLATE.format(
+            instructions=self.instructions,
+            tools="\n".join(f"- {t.name}: {t.description}" for t in self.tools.values()),
+            question=question,
+            max_steps=self.max_steps,
+        )
+        raw = _content(self.llm.invoke(prompt))
+        parsed = _first_json_object(raw)
+        if parsed is None or not isinstance(parsed.get("steps", []), list):
+            return None
+
+        steps, seen = [], set()
+        for step in parsed.get("steps") or []:
+            if not isinstance(step, dict):
+                return None
+            name = step.get("tool")
+            if name not in self.tools:
+                return None
+            arg = str(step.get("input") or question)
+            if (name, arg) in seen:
+                continue
+            seen.add((name, arg))
+            steps.append((name, arg))
+        answer = str(parsed.get("answer") or "").strip()
+        if not steps and not answer:
+            return None
+        return steps[: self.max_steps], answer
+
+    def _run_tools(self, steps: List[Tuple[str, str]]) -> List[str]:
+        # a pool per call, so concurrent requests never queue behind each other's
+        # tools; copy_context keeps request-scoped memoization visible to the workers
+        with ThreadPoolExecutor(max_workers=len(steps), thread_name_prefix="plan-tool") as pool:
+            futures = [
+                pool.submit(contextvars.copy_context().run, self.tools[name].run, arg)
+                for name, arg in steps
+            ]
+            out = []
+            for fut in futures:
+                try:
+                    out.append(str(fut.result()))
+                except Exception as e:
+                    out.append(f"Tool error: {e}")
+        return out
+
+    def invoke(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        question = inputs.get("input", "")
+        planned = self.plan(question)
+        if planned is None:
+            if self.fallback is None:
+                raise ValueError("Could not parse tool plan")
+            print("[planner] unparseable plan, falling back to ReAct")
+            return self.fallback.invoke(inputs)
+
+        steps, answer = planned
+        if steps:
+            observations = self._run_tools(steps)
+            if len(steps) == 1:
+                # a single tool result already answers the request
+                answer = observations[0]
+            else:
+                answer = _content(self.llm.invoke(SYNTH_TEMPLATE.format(
+                    question=question,
+                    observations="\n".join(f"[{name}] {obs}" for (name, _), obs in zip(steps, observations)),
+                ))).strip()
+
+        if self.memory is not None:
+            self.memory.save_context({"input": question}, {"output": answer})
+        return {"input": question, "output": answer, "plan": steps}
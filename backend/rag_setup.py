@@ -1,5 +1,5 @@
 import os
-import json
+import time
 import itertools
 from dotenv import load_dotenv
 from datasets import load_dataset, logging
@@ -9,20 +9,24 @@ logging.set_verbosity_error()
 # Load GROQ_API_KEY from .env
 load_dotenv()                  
 
-from llama_index.core import Document, VectorStoreIndex
+from llama_index.core import VectorStoreIndex
 from llama_index.core.storage.storage_context import StorageContext
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from llama_index.llms.groq import Groq
 
+from dedup import dedup_reviews, review_document
+from bm25_index import BM25Index, review_search_text
+from embeddings import get_embed_model
+
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 if not GROQ_API_KEY:
     raise RuntimeError("Please set GROQ_API_KEY in your .env")
 
-embed_model = HuggingFaceEmbedding("BAAI/bge-small-en-v1.5")
+embed_model = get_embed_model()
 llm_model   = Groq(model="llama3-70b-8192", api_key=GROQ_API_KEY)
 
 # Stream and Collecting upto MAX_PER_SPLIT reviews/category
 MAX_PER_SPLIT = 5000
+DEDUP_REVIEWS = os.environ.get("DEDUP_REVIEWS", "true").lower() in {"1", "true", "yes"}
 REVIEW_CFGS = [
     "raw_review_All_Beauty",
     "raw_review_Toys_and_Games",
@@ -60,7 +64,7 @@ REVIEW_CFGS = [
     "raw_review_Movies_and_TV",
 ]
 
-raw_texts = []
+raw_payloads = []
 print("Streaming review splits:")
 for cfg in REVIEW_CFGS:
     print(f"\n->{cfg}")
@@ -87,17 +91,31 @@ for cfg in REVIEW_CFGS:
             "title":  rec.get("title") or rec.get("review_title") or "",
             "text":   text,
         }
-        raw_texts.append(json.dumps(payload, ensure_ascii=False))
+        raw_payloads.append(payload)
         kept += 1
     print(f"Collected {kept}")
 
-print(f"\nTotal docs collected = {len(raw_texts)}")
+print(f"\nTotal docs collected = {len(raw_payloads)}")
+
+# Collapse exact/near-duplicate reviews per ASIN before embedding
+if DEDUP_REVIEWS:
+    t0 = time.perf_counter()
+    payloads, stats = dedup_reviews(raw_payloads)
+    shrink = 100.0 * (1 - stats["kept"] / max(1, stats["input"]))
+    print(
+        f"Dedup: kept {stats['kept']}/{stats['input']} "
+        f"(exact={stats['exact_dups']}, near={stats['near_dups']}, "
+        f"index -{shrink:.1f}%) in {time.perf_counter() - t0:.1f}s"
+    )
+else:
+    payloads = [dict(p, dup_count=1) for p in raw_payloads]
 
 
 # Wrap into Llama-index Documents
-docs = [Document(text=t) for t in raw_texts]
+docs = [review_document(p) for p in payloads]
 
 print("\nBuilding the VectorStoreIndex")
+t0 = time.perf_counter()
 storage_context = StorageContext.from_defaults() 
 index = VectorStoreIndex.from_documents(
     docs,
@@ -107,9 +125,20 @@ index = VectorStoreIndex.from_documents(
     show_progress=True,
 )
 
+print(f"Embedded {len(docs)} docs in {time.perf_counter() - t0:.1f}s")
+
 print("Persisting into ./storage…")
 storage_context.persist()
 
+# Lexical index over the same nodes, for hybrid retrieval in llm_wrapper
+t0 = time.perf_counter()
+bm25 = BM25Index().build(
+    (node_id, review_search_text(node.get_content()))
+    for node_id, node in index.docstore.docs.items()
+)
+bm25.save(os.path.join("storage", "bm25.json.gz"))
+print(f"BM25 index over {len(bm25)} nodes built in {time.perf_counter() - t0:.1f}s")
+
 # Verifying RAG Output
 print("\n./storage now contains:")
 for fn in sorted(os.listdir("storage")):
@@ -0,0 +1,102 @@
+import re
+import threading
+import contextvars
+from collections import Counter
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Per-request scratchpad shared by the app and the agent's tools, so a signal
+# (RAG answer, caption, colour, enrichment) is computed once per request no
+# matter which side asks for it first. Concurrent callers of the same key wait
+# on the first computation instead of repeating it.
+
+_current: contextvars.ContextVar[Optional["RequestContext"]] = contextvars.ContextVar("request_ctx", default=None)
+
+
+class RequestContext:
+    def __init__(self, question: str = ""):
+        self.question = question
+        self.counters: Counter = Counter()
+        self.timings: Dict[str, float] = {}
+        self._memo: Dict[Tuple[str, Hashable], Future] = {}
+        self._lock = threading.Lock()
+
+    def memoize(self, kind: str, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            fut = self._memo.get((kind, key))
+            owner = fut is None
+            if owner:
+                fut = self._memo[(kind, key)] = Future()
+                self.counters[f"{kind}_calls"] += 1
+            else:
+                self.counters[f"{kind}_hits"] += 1
+        if owner:
+            try:
+                fut.set_result(fn())
+            except BaseException as e:
+                fut.set_exception(e)
+                # let a later caller retry instead of replaying the failure
+                with self._lock:
+                    self._memo.pop((kind, key), None)
+        return fut.result()
+
+    def prime(self, kind: str, key: Hashable, value: Any) -> None:
+        """Seed a result computed elsewhere (e.g. in a batch) so memoize() returns it."""
+        with self._lock:
+            if (kind, key) not in self._memo:
+                fut = Future()
+                fut.set_result(value)
+                self._memo[(kind, key)] = fut
+
+    def forget(self, *kinds: str) -> None:
+        with self._lock:
+            for key in [k for k in self._memo if k[0] in kinds]:
+                del self._memo[key]
+
+    def count(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] += n
+
+    def add_timing(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+
+def begin(question: str = "") -> contextvars.Token:
+    return _current.set(RequestContext(question))
+
+
+def end(token: contextvars.Token) -> None:
+    _current.reset(token)
+
+
+def current() -> Optional[RequestContext]:
+    return _current.get()
+
+
+def run_in(ctx: RequestContext, fn: Callable[..., Any], *args, **kwargs) -> Any:
+    """Call `fn` with `ctx` as the current context (e.g. from a worker thread)."""
+    token = _current.set(ctx)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _current.reset(token)
+
+
+def memoized(kind: str, key: Hashable, fn: Callable[[], Any]) -> Any:
+    """Run `fn` once per (kind, key) within the current request; outside a request just run it."""
+    ctx = _current.get()
+    if ctx is None:
+        return fn()
+    return ctx.memoize(kind, key, fn)
+
+
+def count(name: str, n: int = 1) -> None:
+    ctx = _current.get()
+    if ctx is not None:
+        ctx.count(name, n)
+
+
+def question_key(text: str) -> str:
+    """Key for question-level signals: `text` lowercased, punctuation and spacing folded."""
+    return " ".join(re.sub(r"[^a-z0-9 ]", " ", (text or "").lower()).split())
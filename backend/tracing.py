@@ -0,0 +1,121 @@
+import time
+import bisect
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Mapping
+
+import request_context
+
+# Lightweight per-stage latency tracing. Each span costs two perf_counter()
+# calls, a bisect and a short locked update, so it is cheap enough to leave on.
+# Durations feed process-wide histograms (served as Prometheus text on
+# /metrics) and the current request's Server-Timing header. Per-request
+# counters (LLM calls, memo hits) are summed into /metrics as well.
+
+METRIC_PREFIX = "snapandknow"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+_lock = threading.Lock()
+_histograms: Dict[str, Histogram] = {}
+_errors: Dict[str, int] = {}
+_counts: Dict[str, int] = {}
+
+
+def record(stage: str, seconds: float, error: bool = False) -> None:
+    with _lock:
+        hist = _histograms.get(stage)
+        if hist is None:
+            hist = _histograms[stage] = Histogram()
+        hist.observe(seconds)
+        if error:
+            _errors[stage] = _errors.get(stage, 0) + 1
+    ctx = request_context.current()
+    if ctx is not None:
+        ctx.add_timing(stage, seconds)
+
+
+def record_error(stage: str) -> None:
+    """Count a failure that `stage` handled itself (fallback value instead of a raise)."""
+    with _lock:
+        _errors[stage] = _errors.get(stage, 0) + 1
+
+
+def add_counts(counters: Mapping[str, int]) -> None:
+    """Add a finished request's counters (request_context) to the process totals."""
+    with _lock:
+        for name, n in counters.items():
+            _counts[name] = _counts.get(name, 0) + n
+
+
+@contextmanager
+def span(stage: str):
+    t0 = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        record(stage, time.perf_counter() - t0, error=True)
+        raise
+    record(stage, time.perf_counter() - t0)
+
+
+def traced(stage: str):
+    """Decorator form of span()."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def render_prometheus() -> str:
+    name = f"{METRIC_PREFIX}_stage_duration_seconds"
+    err_name = f"{METRIC_PREFIX}_stage_errors_total"
+    count_name = f"{METRIC_PREFIX}_request_events_total"
+    lines = [
+        f"# HELP {name} Time spent per pipeline stage.",
+        f"# TYPE {name} histogram",
+    ]
+    with _lock:
+        for stage, hist in sorted(_histograms.items()):
+            cumulative = 0
+            for le, c in zip(hist.buckets, hist.counts):
+                cumulative += c
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {hist.sum:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {hist.count}')
+        lines += [
+            f"# HELP {err_name} Failures per pipeline stage, raised or handled.",
+            f"# TYPE {err_name} counter",
+        ]
+        for stage in sorted(set(_histograms) | set(_errors)):
+            lines.append(f'{err_name}{{stage="{stage}"}} {_errors.get(stage, 0)}')
+        lines += [
+            f"# HELP {count_name} Per-request events (llm_calls, <signal>_calls, <signal>_hits, ...).",
+            f"# TYPE {count_name} counter",
+        ]
+        for event, n in sorted(_counts.items()):
+            lines.append(f'{count_name}{{event="{event}"}} {n}')
+    return "\n".join(lines) + "\n"
+
+
+def server_timing(timings: Dict[str, float]) -> str:
+    """Format stage durations (seconds) as a Server-Timing header value."""
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
@@ -0,0 +1,142 @@
+"""
+LLM round trips and latency per request: ReAct loop vs single-shot planner.
+
+Both agents run against a local stand-in chat model (fixed latency per call)
+and stand-in tools (fixed latency, RAGAnswer counted as one more LLM call),
+so the numbers isolate the orchestration cost. Requires langchain only.
+
+    python benchmarks/bench_agent.py --llm-latency 0.6 --requests 20
+    python benchmarks/bench_agent.py --bad-plan-rate 0.2   # exercise ReAct fallback
+"""
+import os
+import re
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from typing import Any, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "backend"))
+
+from langchain.agents import initialize_agent, Tool  # noqa: E402
+from langchain_core.language_models.chat_models import BaseChatModel  # noqa: E402
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, ChatResult  # noqa: E402
+
+from planner_agent import PlannerAgent  # noqa: E402
+
+QUESTIONS = {
+    "What is this?": ["DescribeImage", "RAGAnswer"],
+    "What color is this?": ["DetectColor"],
+    "What do people think of the Revlon one-step hair dryer?": ["RAGAnswer"],
+    "What is this and what color is it?": ["DescribeImage", "DetectColor", "RAGAnswer"],
+}
+
+_lock = threading.Lock()
+_counts = {"agent_llm": 0, "rag_llm": 0}
+
+
+def _bump(key):
+    with _lock:
+        _counts[key] += 1
+
+
+class StandInChat(BaseChatModel):
+    """Scripted chat model that follows QUESTIONS' intended tool sequence."""
+
+    latency: float = 0.5
+    bad_plan_rate: float = 0.0
+    rng: Any = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "stand-in"
+
+    def _generate(self, messages, stop: Optional[List[str]] = None, run_manager=None, **kwargs):
+        _bump("agent_llm")
+        time.sleep(self.latency)
+        prompt = messages[-1].content
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self._respond(prompt)))])
+
+    def _respond(self, prompt: str) -> str:
+        if "Reply with ONLY a JSON object" in prompt:
+            if self.rng.random() < self.bad_plan_rate:
+                return "I think we should describe the image first."
+            q = re.search(r"User request: (.*)", prompt).group(1).strip()
+            return json.dumps({"steps": [{"tool": t, "input": q} for t in QUESTIONS[q]], "answer": ""})
+        if "Tool results:" in prompt:
+            return "It is a red Revlon hair dryer that reviewers like."
+
+        # ReAct: take the next tool not yet observed, then finish
+        q = prompt.rsplit("Question:", 1)[1].split("\n", 1)[0].strip()
+        done = prompt.rsplit("Question:", 1)[1].count("Observation:")
+        plan = QUESTIONS[q]
+        if done < len(plan):
+            return f"Thought: I should use {plan[done]}.\nAction: {plan[done]}\nAction Input: {q}"
+        return "Thought: I now know the final answer.\nFinal Answer: It is a red Revlon hair dryer that reviewers like."
+
+
+def _tools(tool_latency: float, rag_latency: float):
+    def describe(_):
+        time.sleep(tool_latency)
+        return "a red hair dryer brush"
+
+    def color(_):
+        return "red"
+
+    def rag(_):
+        _bump("rag_llm")
+        time.sleep(rag_latency)
+        return "Reviewers say it dries hair fast but runs hot."
+
+    return [
+        Tool(name="DescribeImage", func=describe, description="Describe the uploaded image."),
+        Tool(name="DetectColor", func=color, description="Dominant color of the uploaded image."),
+        Tool(name="RAGAnswer", func=rag, description="Answer product questions from reviews."),
+    ]
+
+
+def _run(agent, requests, rng):
+    trips, totals, latencies = [], [], []
+    for _ in range(requests):
+        q = rng.choice(list(QUESTIONS))
+        before = dict(_counts)
+        t0 = time.perf_counter()
+        agent.invoke({"input": q})
+        latencies.append(time.perf_counter() - t0)
+        trips.append(_counts["agent_llm"] - before["agent_llm"])
+        totals.append(trips[-1] + _counts["rag_llm"] - before["rag_llm"])
+    return np.asarray(trips), np.asarray(totals), np.asarray(latencies) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=20)
+    ap.add_argument("--llm-latency", type=float, default=0.5, help="seconds per agent LLM call")
+    ap.add_argument("--tool-latency", type=float, default=0.3, help="seconds for DescribeImage")
+    ap.add_argument("--rag-latency", type=float, default=0.8, help="seconds for RAGAnswer (retrieval + LLM)")
+    ap.add_argument("--bad-plan-rate", type=float, default=0.0)
+    args = ap.parse_args()
+
+    tools = _tools(args.tool_latency, args.rag_latency)
+    react_llm = StandInChat(latency=args.llm_latency, rng=random.Random(0))
+    react = initialize_agent(
+        tools=tools, llm=react_llm, agent="zero-shot-react-description",
+        verbose=False, handle_parsing_errors=True,
+    )
+    plan_llm = StandInChat(latency=args.llm_latency, bad_plan_rate=args.bad_plan_rate, rng=random.Random(0))
+    planner = PlannerAgent(plan_llm, tools, fallback=react)
+
+    for name, agent in (("react", react), ("plan", planner)):
+        trips, totals, lat = _run(agent, args.requests, random.Random(1))
+        print(f"{name:<6} agent LLM round trips/request={trips.mean():.2f} "
+              f"(all LLM calls={totals.mean():.2f})  "
+              f"latency p50={np.percentile(lat, 50):.0f}ms p95={np.percentile(lat, 95):.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
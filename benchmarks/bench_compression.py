@@ -0,0 +1,187 @@
+"""
+Prompt size, stand-in LLM latency and evidence retention with and without
+post-retrieval context compression (backend/context_compression.py).
+
+Retrieves the top-k reviews for each labeled fixture query from a synthetic
+review corpus (loadtest/build_index.synthesize), builds the synthesis prompt
+from the raw payloads and from the compressed context, and sends both to the
+stand-in Groq model, whose latency grows with prompt tokens. Compression time
+is reported next to the LLM time it saves; the dense row is measured with the
+sentence-vector cache cleared, i.e. the cost on reviews not seen before.
+
+Since the stand-in answers are canned, answer quality is checked on what the
+LLM gets to see: whether the labeled evidence sentence for each query
+(fixtures/queries.jsonl "evidence") survives, and what share of the query's
+terms the context still covers. A final check feeds a top-k made only of long
+unpunctuated reviews and fails (exit 1) if the context comes back empty or
+over budget.
+
+    python benchmarks/bench_compression.py
+    python benchmarks/bench_compression.py --budget 250 --mock-embed   # plumbing only, no model
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import argparse
+
+import numpy as np
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, os.pardir, "backend"))
+sys.path.insert(0, os.path.join(HERE, "loadtest"))
+
+from bm25_index import tokenize  # noqa: E402
+from memory_store import count_tokens  # noqa: E402
+from context_compression import CONTEXT_TOKEN_BUDGET, clear_sentence_cache, compress_passages  # noqa: E402
+from build_index import REVIEWS, synthesize  # noqa: E402
+from stub_groq import StubGroq  # noqa: E402
+
+# llama_index's default text QA template, which the query engine uses
+QA_TEMPLATE = (
+    "Context information is below.\n"
+    "---------------------\n"
+    "{context}\n"
+    "---------------------\n"
+    "Given the context information and not prior knowledge, answer the query.\n"
+    "Query: {query}\n"
+    "Answer: "
+)
+
+
+class HashedBagOfWords:
+    """Plumbing-only stand-in for the embedding model (--mock-embed)."""
+
+    def __init__(self, dim: int = 512):
+        self.dim = dim
+
+    def get_text_embedding_batch(self, texts):
+        mat = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for tok in tokenize(text):
+                mat[row, zlib.crc32(tok.encode()) % self.dim] += 1.0
+        return mat.tolist()
+
+    def get_query_embedding(self, text):
+        return self.get_text_embedding_batch([text])[0]
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _coverage(query: str, context: str) -> float:
+    terms = set(tokenize(query))
+    return len(terms & set(tokenize(context))) / len(terms) if terms else 1.0
+
+
+def _llm_seconds(stub: StubGroq, prompt: str) -> float:
+    t0 = time.perf_counter()
+    stub.complete(prompt, "stand-in", chat=False)
+    return time.perf_counter() - t0
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, time.perf_counter() - t0
+
+
+def check_long_reviews(embed_model, budget: int) -> bool:
+    """Top-k made only of long unpunctuated reviews must still yield context within budget."""
+    rng = random.Random(0)
+    words = " ".join(r["text"] for r in _read_jsonl(REVIEWS)).replace(".", "").split()
+    passages = [
+        json.dumps({"type": "review", "asin": "B000TEST00", "rating": 3.0, "title": "long",
+                    "text": " ".join(rng.choice(words) for _ in range(400))})
+        for _ in range(5)
+    ]
+    query = "does it get hot"
+    ok = True
+    for mode, kwargs in (
+        ("dense", {"query_embedding": embed_model.get_query_embedding(query),
+                   "embed_texts": embed_model.get_text_embedding_batch}),
+        ("lexical", {"query_text": query}),
+    ):
+        for b in (budget, 20):
+            texts, stats = compress_passages(passages, token_budget=b, **kwargs)
+            if not any(texts) or stats["tokens_after"] > b:
+                print(f"FAIL long-review check ({mode}, budget={b}): {stats}")
+                ok = False
+    if ok:
+        print(f"long-review check: ok ({len(passages[0])} chars/review, no punctuation)")
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--queries", default=os.path.join(HERE, "fixtures", "queries.jsonl"))
+    ap.add_argument("--size", type=int, default=400, help="synthetic corpus size")
+    ap.add_argument("-k", type=int, default=5)
+    ap.add_argument("--budget", type=int, default=CONTEXT_TOKEN_BUDGET)
+    ap.add_argument("--llm-ttft", type=float, default=0.2)
+    ap.add_argument("--llm-prefill-tokens-per-s", type=float, default=5000.0)
+    ap.add_argument("--mock-embed", action="store_true", help="hashed bag-of-words instead of the embedding model")
+    args = ap.parse_args()
+
+    if args.mock_embed:
+        embed_model = HashedBagOfWords()
+    else:
+        from embeddings import get_embed_model
+        embed_model = get_embed_model()
+
+    reviews = synthesize(args.size)
+    docs = [json.dumps(r, ensure_ascii=False) for r in reviews]
+    mat = np.asarray(embed_model.get_text_embedding_batch(docs), dtype=np.float32)
+    mat /= np.maximum(np.linalg.norm(mat, axis=1, keepdims=True), 1e-9)
+    queries = _read_jsonl(args.queries)
+    stub = StubGroq(ttft=args.llm_ttft, prefill_tokens_per_s=args.llm_prefill_tokens_per_s)
+    embed_texts = embed_model.get_text_embedding_batch
+
+    # full: raw payloads; dense: ranked by the retrieval embedding (cold = sentence
+    # cache cleared first); lexical: the no-embedding path used after BM25-only retrieval
+    rows = {"full": [], "dense": [], "lexical": []}
+    warm_s = []
+    for q in queries:
+        qv = np.asarray(embed_model.get_query_embedding(q["query"]), dtype=np.float32)
+        passages = [docs[i] for i in np.argsort(-(mat @ qv))[: args.k]]
+
+        clear_sentence_cache()
+        dense, dense_s = _timed(lambda: compress_passages(
+            passages, qv, embed_texts, token_budget=args.budget)[0])
+        warm_s.append(_timed(lambda: compress_passages(passages, qv, embed_texts, token_budget=args.budget))[1])
+        lexical, lexical_s = _timed(lambda: compress_passages(
+            passages, query_text=q["query"], token_budget=args.budget)[0])
+
+        for name, ctx, spent in (("full", passages, 0.0), ("dense", dense, dense_s), ("lexical", lexical, lexical_s)):
+            context = "\n\n".join(t for t in ctx if t)
+            prompt = QA_TEMPLATE.format(context=context, query=q["query"])
+            rows[name].append({
+                "tokens": count_tokens(prompt),
+                "compress": spent,
+                "llm": _llm_seconds(stub, prompt),
+                "evidence": q["evidence"].lower() in context.lower(),
+                "coverage": _coverage(q["query"], context),
+            })
+
+    print(f"{len(queries)} queries, top-{args.k} of {len(docs)} reviews, budget={args.budget} tokens, "
+          f"dense compression warm-cache p50={1000 * np.percentile(warm_s, 50):.1f}ms")
+    full_llm = np.percentile([r["llm"] for r in rows["full"]], 50)
+    for name, rs in rows.items():
+        llm = np.percentile([r["llm"] for r in rs], 50)
+        compress = np.percentile([r["compress"] for r in rs], 50)
+        print(f"{name:<8} prompt tokens={np.mean([r['tokens'] for r in rs]):5.0f}  "
+              f"compression p50={1000 * compress:6.1f}ms  LLM p50={1000 * llm:5.0f}ms "
+              f"(saved {1000 * (full_llm - llm):4.0f}ms)  "
+              f"evidence kept={np.mean([r['evidence'] for r in rs]):.2f}  "
+              f"term coverage={np.mean([r['coverage'] for r in rs]):.2f}")
+
+    if not check_long_reviews(embed_model, args.budget):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
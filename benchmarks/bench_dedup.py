@@ -0,0 +1,86 @@
+"""
+Measure what review dedup buys at ingestion time.
+
+Streams a sample of one review split, dedups it, then embeds the raw and
+deduped sets and times a brute-force top-5 search over each.
+
+    python benchmarks/bench_dedup.py --split raw_review_All_Beauty --limit 2000
+"""
+import os
+import sys
+import time
+import argparse
+import itertools
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "backend"))
+
+from dedup import dedup_reviews, review_text  # noqa: E402
+
+
+def _load(split: str, limit: int):
+    from datasets import load_dataset
+    ds = load_dataset("McAuley-Lab/Amazon-Reviews-2023", split, split="full", streaming=True)
+    out = []
+    for rec in itertools.islice(ds, limit):
+        text = rec.get("text") or ""
+        if not text.strip():
+            continue
+        out.append({
+            "type": "review",
+            "asin": rec.get("parent_asin") or rec.get("asin", ""),
+            "rating": rec.get("rating"),
+            "title": rec.get("title") or "",
+            "text": text,
+        })
+    return out
+
+
+def _embed(embed_model, payloads):
+    t0 = time.perf_counter()
+    texts = [review_text(p) for p in payloads]
+    vecs = embed_model.get_text_embedding_batch(texts)
+    return np.asarray(vecs, dtype=np.float32), time.perf_counter() - t0
+
+
+def _search_ms(mat: np.ndarray, queries: np.ndarray, k: int = 5) -> float:
+    t0 = time.perf_counter()
+    for q in queries:
+        scores = mat @ q
+        np.argpartition(-scores, min(k, len(scores) - 1))[:k]
+    return 1000 * (time.perf_counter() - t0) / len(queries)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--split", default="raw_review_All_Beauty")
+    ap.add_argument("--limit", type=int, default=2000)
+    ap.add_argument("--no-embed", action="store_true", help="only report dedup stats")
+    args = ap.parse_args()
+
+    raw = _load(args.split, args.limit)
+    t0 = time.perf_counter()
+    kept, stats = dedup_reviews(raw)
+    dedup_s = time.perf_counter() - t0
+    shrink = 100.0 * (1 - stats["kept"] / max(1, stats["input"]))
+    print(f"docs: {stats['input']} -> {stats['kept']} (-{shrink:.1f}%), "
+          f"exact={stats['exact_dups']} near={stats['near_dups']}, dedup {dedup_s:.2f}s")
+
+    if args.no_embed:
+        return
+
+    from embeddings import get_embed_model
+    embed_model = get_embed_model()
+
+    raw_mat, raw_s = _embed(embed_model, raw)
+    kept_mat, kept_s = _embed(embed_model, kept)
+    queries = raw_mat[np.random.RandomState(0).choice(len(raw_mat), size=min(200, len(raw_mat)), replace=False)]
+
+    print(f"build (embed): {raw_s:.1f}s -> {kept_s + dedup_s:.1f}s incl. dedup")
+    print(f"index vectors: {raw_mat.nbytes / 1e6:.1f}MB -> {kept_mat.nbytes / 1e6:.1f}MB")
+    print(f"top-5 search:  {_search_ms(raw_mat, queries):.3f}ms -> {_search_ms(kept_mat, queries):.3f}ms per query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Query-embedding latency and retrieval agreement per EMBED_BACKEND.
+
+Embeds the fixture corpus and queries with each backend and reports
+per-query latency (first call and repeated call, which hits the query
+cache on ONNX), recall@k on the labeled queries, and top-k overlap with
+the first backend listed (torch by default) -- both against the backend's
+own index and against the baseline-built index, i.e. swapping the query
+backend without re-indexing.
+
+    python benchmarks/bench_embeddings.py
+    python benchmarks/bench_embeddings.py --backends torch,onnx-int8 --threads 2
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, os.pardir, "backend"))
+
+from embeddings import EMBED_THREADS, make_embed_model  # noqa: E402
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _matrix(vectors):
+    mat = np.asarray(vectors, dtype=np.float32)
+    return mat / np.linalg.norm(mat, axis=-1, keepdims=True)
+
+
+def _top(mat, qv, k):
+    return set(np.argsort(-(mat @ qv))[:k].tolist())
+
+
+def _ms(latencies, pct):
+    return 1000 * np.percentile(latencies, pct)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reviews", default=os.path.join(HERE, "fixtures", "reviews.jsonl"))
+    ap.add_argument("--queries", default=os.path.join(HERE, "fixtures", "queries.jsonl"))
+    ap.add_argument("--backends", default="torch,onnx,onnx-int8")
+    ap.add_argument("--threads", type=int, default=EMBED_THREADS)
+    ap.add_argument("-k", type=int, default=5)
+    args = ap.parse_args()
+
+    docs = [json.dumps(r, ensure_ascii=False) for r in _read_jsonl(args.reviews)]
+    asins = [json.loads(d)["asin"] for d in docs]
+    queries = _read_jsonl(args.queries)
+
+    base_mat = None  # baseline corpus matrix
+    base_top = None  # baseline top-k per query
+    for backend in args.backends.split(","):
+        try:
+            t0 = time.perf_counter()
+            model = make_embed_model(backend, threads=args.threads)
+            load_s = time.perf_counter() - t0
+        except Exception as e:
+            print(f"{backend:<10} skipped: {e}")
+            continue
+
+        t0 = time.perf_counter()
+        mat = _matrix(model.get_text_embedding_batch(docs))
+        index_s = time.perf_counter() - t0
+
+        first, repeat, qvs = [], [], []
+        for q in queries:
+            t0 = time.perf_counter()
+            qv = model.get_query_embedding(q["query"])
+            first.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            model.get_query_embedding(q["query"])
+            repeat.append(time.perf_counter() - t0)
+            qvs.append(qv)
+        qvs = _matrix(qvs)
+
+        tops = [_top(mat, qv, args.k) for qv in qvs]
+        recall = np.mean([any(asins[i] == q["asin"] for i in top) for top, q in zip(tops, queries)])
+        if base_mat is None:
+            base_mat, base_top = mat, tops
+        overlap_own = np.mean([len(a & b) / args.k for a, b in zip(tops, base_top)])
+        overlap_base_index = np.mean([
+            len(_top(base_mat, qv, args.k) & b) / args.k for qv, b in zip(qvs, base_top)
+        ])
+
+        print(f"{backend:<10} load={load_s:.1f}s index={1000 * index_s:.0f}ms  "
+              f"query p50={_ms(first, 50):.2f}ms p95={_ms(first, 95):.2f}ms  "
+              f"repeat p50={_ms(repeat, 50):.3f}ms  recall@{args.k}={recall:.2f}  "
+              f"top{args.k} overlap own-index={overlap_own:.2f} base-index={overlap_base_index:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Simulate a long multi-user run and compare prompt growth between one shared
+unbounded buffer (the old ConversationBufferMemory setup) and the per-session
+token-budgeted store.
+
+LLM latency is modelled as base + per-token cost of the prompt, so no model
+or API key is needed.
+
+    python benchmarks/bench_memory.py --users 50 --turns 40
+    python benchmarks/bench_memory.py --backend disk
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, "backend"))
+
+from memory_store import SessionMemoryStore, InProcessBackend, DiskBackend, count_tokens  # noqa: E402
+
+TEMPLATE_TOKENS = count_tokens(
+    "You are a helpful assistant. Use the conversation history\n"
+    "and then answer the user's latest query.\n\nConversation History:\n\n\nUser: \nAssistant:"
+)
+
+QUESTIONS = [
+    "What do people think of the Revlon one-step hair dryer?",
+    "Is the Dyson Supersonic worth the price compared to cheaper dryers?",
+    "How long does the battery last on the Anker PowerCore 10000?",
+    "What color is this?",
+    "How much is this right now on Amazon?",
+    "Does the Instant Pot sealing ring keep smells?",
+]
+
+
+def _answer(rng: random.Random) -> str:
+    sentences = [
+        "Reviewers mostly praise how quickly it works.",
+        "A few people mention it runs hot on the highest setting.",
+        "Several reviews say it stopped working after some months.",
+        "Overall sentiment is positive with an average rating around four stars.",
+        "The current listed price changes often between sellers.",
+    ]
+    return " ".join(rng.sample(sentences, k=rng.randint(2, 5)))
+
+
+class SharedBuffer:
+    """Stand-in for the old single process-wide ConversationBufferMemory."""
+
+    def __init__(self):
+        self.lines = []
+
+    def history(self, sid):
+        return "\n".join(self.lines)
+
+    def append(self, sid, human, ai):
+        self.lines.append(f"Human: {human}\nAI: {ai}")
+
+
+def run(memory, users: int, turns: int, base_ms: float, per_token_ms: float, seed: int = 0):
+    rng = random.Random(seed)
+    schedule = [u for u in range(users) for _ in range(turns)]
+    rng.shuffle(schedule)
+
+    prompt_tokens, latencies, overhead = [], [], []
+    for u in schedule:
+        sid = f"user-{u}"
+        q = rng.choice(QUESTIONS)
+        t0 = time.perf_counter()
+        history = memory.history(sid)
+        overhead.append(time.perf_counter() - t0)
+        tokens = TEMPLATE_TOKENS + count_tokens(history) + count_tokens(q)
+        prompt_tokens.append(tokens)
+        latencies.append(base_ms + per_token_ms * tokens)
+        t0 = time.perf_counter()
+        memory.append(sid, q, _answer(rng))
+        overhead[-1] += time.perf_counter() - t0
+    return np.asarray(prompt_tokens), np.asarray(latencies), np.asarray(overhead) * 1000
+
+
+def _report(name, tokens, latencies, overhead):
+    last = tokens[-max(1, len(tokens) // 10):]
+    print(f"{name:<10} prompt tokens p50={np.percentile(tokens, 50):.0f} "
+          f"last10%={last.mean():.0f} max={tokens.max()}  "
+          f"modelled latency p50={np.percentile(latencies, 50):.0f}ms p95={np.percentile(latencies, 95):.0f}ms  "
+          f"memory overhead p95={np.percentile(overhead, 95):.3f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=50)
+    ap.add_argument("--turns", type=int, default=40)
+    ap.add_argument("--backend", choices=["memory", "disk"], default="memory")
+    ap.add_argument("--window-tokens", type=int, default=768)
+    ap.add_argument("--max-total-tokens", type=int, default=200_000)
+    ap.add_argument("--base-ms", type=float, default=250.0, help="fixed LLM latency per call")
+    ap.add_argument("--per-token-ms", type=float, default=0.15, help="prompt processing cost per token")
+    args = ap.parse_args()
+
+    shared = run(SharedBuffer(), args.users, args.turns, args.base_ms, args.per_token_ms)
+    _report("shared", *shared)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = DiskBackend(tmp) if args.backend == "disk" else InProcessBackend()
+        store = SessionMemoryStore(
+            backend, window_tokens=args.window_tokens, max_total_tokens=args.max_total_tokens
+        )
+        session = run(store, args.users, args.turns, args.base_ms, args.per_token_ms)
+        _report(f"session/{args.backend}", *session)
+        stats = store.stats()
+        print(f"store holds {stats['sessions']} sessions / {stats['tokens']} tokens "
+              f"(cap {args.max_total_tokens})")
+
+
+if __name__ == "__main__":
+    main()
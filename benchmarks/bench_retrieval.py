@@ -0,0 +1,104 @@
+"""
+Query latency and recall@k for lexical, dense and hybrid retrieval.
+
+Runs over the labeled fixture corpus (benchmarks/fixtures) by default; a
+query counts as a hit when a review for its labeled ASIN is in the top k.
+
+    python benchmarks/bench_retrieval.py            # BM25 + dense + hybrid
+    python benchmarks/bench_retrieval.py --no-dense # BM25 only, no model download
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, os.pardir, "backend"))
+
+from bm25_index import BM25Index, is_token_heavy, rrf_fuse, review_search_text  # noqa: E402
+
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _report(name, hits, latencies, k):
+    lat = np.asarray(latencies) * 1000
+    print(f"{name:<8} recall@{k}={np.mean(hits):.2f}  "
+          f"p50={np.percentile(lat, 50):.2f}ms  p95={np.percentile(lat, 95):.2f}ms")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--reviews", default=os.path.join(HERE, "fixtures", "reviews.jsonl"))
+    ap.add_argument("--queries", default=os.path.join(HERE, "fixtures", "queries.jsonl"))
+    ap.add_argument("-k", type=int, default=5)
+    ap.add_argument("--no-dense", action="store_true")
+    args = ap.parse_args()
+
+    docs = [json.dumps(r, ensure_ascii=False) for r in _read_jsonl(args.reviews)]
+    asins = [json.loads(d)["asin"] for d in docs]
+    queries = _read_jsonl(args.queries)
+
+    t0 = time.perf_counter()
+    bm25 = BM25Index().build((str(i), review_search_text(d)) for i, d in enumerate(docs))
+    print(f"BM25 build: {1000 * (time.perf_counter() - t0):.1f}ms over {len(docs)} docs")
+
+    def hit(ids, label):
+        return any(asins[int(i)] == label for i in ids)
+
+    results = {"bm25": ([], [])}
+    lexical_ranked = []
+    for q in queries:
+        t0 = time.perf_counter()
+        ids = [i for i, _ in bm25.search(q["query"], args.k)]
+        results["bm25"][1].append(time.perf_counter() - t0)
+        results["bm25"][0].append(hit(ids, q["asin"]))
+        lexical_ranked.append((ids, results["bm25"][1][-1]))
+
+    if not args.no_dense:
+        from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+        embed_model = HuggingFaceEmbedding("BAAI/bge-small-en-v1.5")
+        mat = np.asarray(embed_model.get_text_embedding_batch(docs), dtype=np.float32)
+        mat /= np.linalg.norm(mat, axis=1, keepdims=True)
+
+        results["dense"] = ([], [])
+        results["hybrid"] = ([], [])
+        for q, (lex_ids, lex_s) in zip(queries, lexical_ranked):
+            t0 = time.perf_counter()
+            qv = np.asarray(embed_model.get_query_embedding(q["query"]), dtype=np.float32)
+            dense_ids = [str(i) for i in np.argsort(-(mat @ qv))[: args.k]]
+            dense_s = time.perf_counter() - t0
+            results["dense"][0].append(hit(dense_ids, q["asin"]))
+            results["dense"][1].append(dense_s)
+
+            # Same policy as llm_wrapper.HybridRetriever
+            if lex_ids and is_token_heavy(q["query"]):
+                ids, elapsed = lex_ids, lex_s
+            else:
+                ids = [i for i, _ in rrf_fuse([lex_ids, dense_ids], k=args.k)]
+                elapsed = lex_s + dense_s
+            results["hybrid"][0].append(hit(ids, q["asin"]))
+            results["hybrid"][1].append(elapsed)
+
+        skipped = sum(1 for q in queries if is_token_heavy(q["query"]))
+        print(f"hybrid skipped the embedding for {skipped}/{len(queries)} token-heavy queries")
+
+    # In the app the RAG prompt is prefixed with enrichment context, which names
+    # an ASIN; routing must look at the bare question, not the rendered prompt.
+    from enrichment import context_line
+    on_prompt = sum(is_token_heavy(context_line({"asin": q["asin"]}) + q["query"]) for q in queries)
+    on_question = sum(is_token_heavy(q["query"]) for q in queries)
+    print(f"lexical-only routing: {on_question}/{len(queries)} on the question, "
+          f"{on_prompt}/{len(queries)} if routed on the enriched prompt")
+
+    for name, (hits, latencies) in results.items():
+        _report(name, hits, latencies, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Replays saved Amazon search and product pages for enrichment.py.
+
+GET /s?k=<query> serves the search page whose keyword (fixtures/amazon/
+index.json) appears in the query, else the default search page.
+GET /dp/<ASIN> serves dp_<ASIN>.html, or 404 like a delisted product.
+Point the app at it with AMAZON_BASE_URL.
+
+    python benchmarks/loadtest/amazon_fixtures.py --port 9200 --latency 0.15
+"""
+import os
+import re
+import json
+import time
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "fixtures", "amazon")
+_DP_RE = re.compile(r"/dp/([A-Z0-9]{10})")
+
+
+class AmazonFixtures:
+    def __init__(self, pages_dir: str = PAGES_DIR, latency: float = 0.15):
+        self.pages_dir = pages_dir
+        self.latency = latency
+        with open(os.path.join(pages_dir, "index.json"), encoding="utf-8") as f:
+            self.index = json.load(f)
+
+    def page_for(self, path: str, query: str):
+        m = _DP_RE.search(path)
+        if m:
+            name = f"dp_{m.group(1)}.html"
+        elif path.rstrip("/") == "/s":
+            q = query.lower()
+            name = next((page for kw, page in self.index["search"].items() if kw in q), self.index["default_search"])
+        else:
+            return None
+        full = os.path.join(self.pages_dir, name)
+        if not os.path.isfile(full):
+            return None
+        with open(full, "rb") as f:
+            return f.read()
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+        fixtures = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = " ".join(parse_qs(url.query).get("k", []))
+                time.sleep(fixtures.latency)
+                body = fixtures.page_for(url.path, query)
+                if body is None:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9200)
+    ap.add_argument("--pages-dir", default=PAGES_DIR)
+    ap.add_argument("--latency", type=float, default=0.15)
+    args = ap.parse_args()
+    server = AmazonFixtures(args.pages_dir, args.latency).serve(args.host, args.port)
+    print(f"Amazon fixtures on http://{args.host}:{server.server_address[1]} (AMAZON_BASE_URL)")
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Catalog throughput: items/min through /upload_and_query (one HTTP request
+per photo, at --concurrency) versus one streamed /batch_query request.
+
+Runs fully offline on the same stand-ins as run_offline.py.
+
+    python benchmarks/loadtest/bench_batch.py --items 200 -c 8
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from loadgen import IMAGE_LABELS, make_image  # noqa: E402
+from run_offline import start_offline_app  # noqa: E402
+from build_index import DEFAULT_OUT  # noqa: E402
+
+QUESTIONS = ["What is this?", "What brand is this?", "How much is this?", "What do people think of this?"]
+
+
+def _catalog(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    # a real catalog repeats products across listings; keep some exact repeats
+    photos = [make_image(f"{label} {i}", color) for i in range(max(1, n // 4)) for label, color in IMAGE_LABELS]
+    return [(rng.choice(photos), rng.choice(QUESTIONS)) for _ in range(n)]
+
+
+def single(url: str, items, concurrency: int) -> float:
+    def one(item):
+        img, q = item
+        sess = requests.Session()
+        sess.post(f"{url}/upload_and_query", data={"query": q},
+                  files={"image": ("photo.png", img, "image/png")}, timeout=300).raise_for_status()
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        list(ex.map(one, items))
+    return time.perf_counter() - t0
+
+
+def batched(url: str, items) -> float:
+    files = [("images", (f"{i}.png", img, "image/png")) for i, (img, _) in enumerate(items)]
+    data = [("queries", q) for _, q in items]
+    t0 = time.perf_counter()
+    done = errors = 0
+    with requests.post(f"{url}/batch_query", data=data, files=files, stream=True, timeout=3600) as resp:
+        resp.raise_for_status()
+        for line in resp.iter_lines():
+            if line:
+                done += 1
+                errors += "error" in json.loads(line)
+    if done != len(items) or errors:
+        print(f"batch returned {done}/{len(items)} items, {errors} errors")
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--items", type=int, default=100)
+    ap.add_argument("-c", "--concurrency", type=int, default=4, help="parallel requests for the single path")
+    ap.add_argument("--storage", default=DEFAULT_OUT)
+    args = ap.parse_args()
+
+    url, stub, http = start_offline_app(args.storage)
+    items = _catalog(args.items)
+    batched(url, items[:2])  # warm up models
+
+    calls = stub.calls
+    s = single(url, items, args.concurrency)
+    single_calls = stub.calls - calls
+    calls = stub.calls
+    b = batched(url, items)
+    batch_calls = stub.calls - calls
+
+    print(f"single  {60 * len(items) / s:8.1f} items/min  ({s:.1f}s, {single_calls / len(items):.2f} LLM calls/item)")
+    print(f"batch   {60 * len(items) / b:8.1f} items/min  ({b:.1f}s, {batch_calls / len(items):.2f} LLM calls/item)")
+    http.shutdown()
+
+
+if __name__ == "__main__":
+    main()
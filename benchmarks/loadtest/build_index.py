@@ -0,0 +1,88 @@
+"""
+Build a small synthetic review index for load tests.
+
+Expands benchmarks/fixtures/reviews.jsonl to --size reviews by recombining
+sentences across reviews of the same product, then persists a vector index
+and BM25 index the same way rag_setup.py does, without streaming the real
+dataset or calling Groq.
+
+    python benchmarks/loadtest/build_index.py --out benchmarks/.cache/storage --size 2000
+
+The embedding model must already be in the local Hugging Face cache
+(HF_HUB_OFFLINE=1 is fine); --mock-embed skips it for pure plumbing runs.
+"""
+import os
+import re
+import sys
+import json
+import random
+import argparse
+from collections import defaultdict
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, os.pardir, os.pardir, "backend"))
+
+from bm25_index import BM25Index, review_search_text  # noqa: E402
+from dedup import review_document  # noqa: E402
+
+REVIEWS = os.path.join(HERE, os.pardir, "fixtures", "reviews.jsonl")
+DEFAULT_OUT = os.path.join(HERE, os.pardir, ".cache", "storage")
+
+
+def synthesize(size: int, seed: int = 0):
+    with open(REVIEWS, encoding="utf-8") as f:
+        base = [json.loads(line) for line in f if line.strip()]
+    by_asin = defaultdict(list)
+    for r in base:
+        by_asin[r["asin"]].append(r)
+
+    rng = random.Random(seed)
+    out = list(base)
+    while len(out) < size:
+        r = rng.choice(base)
+        pool = [s for other in by_asin[r["asin"]] for s in re.split(r"(?<=[.!?])\s+", other["text"]) if s]
+        text = " ".join(rng.sample(pool, k=min(len(pool), rng.randint(2, 4))))
+        out.append({
+            "type": "review",
+            "asin": r["asin"],
+            "rating": float(max(1, min(5, r["rating"] + rng.choice((-1, 0, 0, 1))))),
+            "title": r["title"],
+            "text": text,
+            "dup_count": 1,
+        })
+    return out[:size]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--out", default=DEFAULT_OUT)
+    ap.add_argument("--size", type=int, default=2000)
+    ap.add_argument("--mock-embed", action="store_true")
+    args = ap.parse_args()
+
+    from llama_index.core import VectorStoreIndex
+    from llama_index.core.storage.storage_context import StorageContext
+
+    if args.mock_embed:
+        from llama_index.core.embeddings import MockEmbedding
+        embed_model = MockEmbedding(embed_dim=384)
+    else:
+        from embeddings import get_embed_model
+        embed_model = get_embed_model()
+
+    payloads = synthesize(args.size)
+    docs = [review_document(p) for p in payloads]
+    storage_context = StorageContext.from_defaults()
+    index = VectorStoreIndex.from_documents(docs, embed_model=embed_model, storage_context=storage_context)
+    os.makedirs(args.out, exist_ok=True)
+    storage_context.persist(persist_dir=args.out)
+
+    BM25Index().build(
+        (node_id, review_search_text(node.get_content()))
+        for node_id, node in index.docstore.docs.items()
+    ).save(os.path.join(args.out, "bm25.json.gz"))
+    print(f"synthetic index with {len(docs)} reviews -> {os.path.abspath(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Load generator for /upload_and_query.
+
+Sends a mix of image and text questions at a fixed concurrency, one cookie
+session per worker, and reports throughput, p50/p95/p99 latency and per-stage
+breakdowns parsed from the Server-Timing header. With --baseline, exits
+non-zero when p95 latency (overall or any stage) regresses past --threshold.
+
+    python benchmarks/loadtest/loadgen.py --url http://127.0.0.1:8000 -c 8 -n 200 --json run.json
+    python benchmarks/loadtest/loadgen.py ... --baseline run.json --threshold 0.2
+"""
+import io
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+from PIL import Image, ImageDraw
+
+IMAGE_QUESTIONS = ["What is this?", "What color is this?", "What brand is this?", "How much is this?"]
+TEXT_QUESTIONS = [
+    "What do people think of the Revlon one-step hair dryer?",
+    "Is the Dyson Supersonic worth it?",
+    "How much is the Anker PowerCore 10000?",
+    "Does the Instant Pot sealing ring keep smells?",
+    "Nintendo Switch OLED reviews",
+]
+IMAGE_LABELS = [("REVLON", (200, 30, 40)), ("DYSON", (120, 60, 160)), ("ANKER", (20, 20, 20)), ("NINTENDO", (230, 230, 230))]
+
+
+def make_image(label: str, color) -> bytes:
+    img = Image.new("RGB", (320, 320), color)
+    draw = ImageDraw.Draw(img)
+    draw.rectangle((40, 220, 280, 280), fill=(255, 255, 255))
+    draw.text((60, 240), label, fill=(0, 0, 0))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def parse_server_timing(header: str):
+    out = {}
+    for part in (header or "").split(","):
+        name, _, rest = part.strip().partition(";")
+        if name and rest.startswith("dur="):
+            out[name] = float(rest[4:]) / 1000
+    return out
+
+
+def run(url: str, concurrency: int, total: int, image_ratio: float, seed: int = 0):
+    images = [make_image(label, color) for label, color in IMAGE_LABELS]
+    rng = random.Random(seed)
+    plan = []
+    for _ in range(total):
+        if rng.random() < image_ratio:
+            plan.append((rng.choice(IMAGE_QUESTIONS), rng.choice(images)))
+        else:
+            plan.append((rng.choice(TEXT_QUESTIONS), None))
+
+    local = threading.local()
+
+    def one(item):
+        q, img = item
+        sess = getattr(local, "session", None)
+        if sess is None:
+            sess = local.session = requests.Session()
+        files = {"image": ("photo.png", img, "image/png")} if img else None
+        t0 = time.perf_counter()
+        try:
+            resp = sess.post(f"{url.rstrip('/')}/upload_and_query", data={"query": q}, files=files, timeout=300)
+            ok = resp.ok and resp.json().get("ok", False)
+            stages = parse_server_timing(resp.headers.get("Server-Timing", ""))
+        except requests.RequestException:
+            ok, stages = False, {}
+        return time.perf_counter() - t0, ok, stages
+
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as ex:
+        results = list(ex.map(one, plan))
+    wall = time.perf_counter() - t0
+
+    latencies = np.asarray([r[0] for r in results])
+    stage_samples = defaultdict(list)
+    for _, _, stages in results:
+        for name, dur in stages.items():
+            stage_samples[name].append(dur)
+
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": sum(1 for r in results if not r[1]),
+        "throughput_rps": total / wall,
+        "latency_s": {p: float(np.percentile(latencies, int(p[1:]))) for p in ("p50", "p95", "p99")},
+        "stages_s": {
+            name: {"mean": float(np.mean(v)), "p95": float(np.percentile(v, 95)), "n": len(v)}
+            for name, v in sorted(stage_samples.items())
+        },
+    }
+
+
+def print_report(report):
+    lat = report["latency_s"]
+    print(f"{report['requests']} requests @ c={report['concurrency']}: "
+          f"{report['throughput_rps']:.2f} req/s, errors={report['errors']}")
+    print(f"latency p50={lat['p50'] * 1000:.0f}ms p95={lat['p95'] * 1000:.0f}ms p99={lat['p99'] * 1000:.0f}ms")
+    print(f"{'stage':<16}{'n':>6}{'mean ms':>10}{'p95 ms':>10}")
+    for name, s in report["stages_s"].items():
+        print(f"{name:<16}{s['n']:>6}{s['mean'] * 1000:>10.1f}{s['p95'] * 1000:>10.1f}")
+
+
+def regressions(report, baseline, threshold: float):
+    found = []
+    checks = [("latency", baseline["latency_s"]["p95"], report["latency_s"]["p95"])]
+    for name, s in baseline["stages_s"].items():
+        if name in report["stages_s"]:
+            checks.append((name, s["p95"], report["stages_s"][name]["p95"]))
+    for name, old, new in checks:
+        if old > 0 and new > old * (1 + threshold):
+            found.append(f"{name}: p95 {old * 1000:.0f}ms -> {new * 1000:.0f}ms")
+    return found
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--url", default="http://127.0.0.1:8000")
+    ap.add_argument("-c", "--concurrency", type=int, default=4)
+    ap.add_argument("-n", "--requests", type=int, default=100)
+    ap.add_argument("--image-ratio", type=float, default=0.5)
+    ap.add_argument("--json", help="write the report here")
+    ap.add_argument("--baseline", help="previous --json report to compare against")
+    ap.add_argument("--threshold", type=float, default=0.2, help="allowed p95 slowdown (0.2 = 20%%)")
+    args = ap.parse_args()
+
+    report = run(args.url, args.concurrency, args.requests, args.image_ratio)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(report, json.load(f), args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+End-to-end offline load test.
+
+Starts the stand-in Groq server and Amazon page replay, builds the synthetic
+review index if needed, boots app.py against them in-process, and drives it
+with loadgen. Nothing leaves the machine; the embedding and caption models
+are loaded from the local Hugging Face cache.
+
+    python benchmarks/loadtest/run_offline.py -c 8 -n 200 --json bench_run.json
+    python benchmarks/loadtest/run_offline.py -c 8 -n 200 --baseline bench_run.json
+"""
+import os
+import sys
+import json
+import logging
+import argparse
+import threading
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+sys.path.insert(0, os.path.join(HERE, os.pardir, os.pardir, "backend"))
+
+import loadgen  # noqa: E402
+from stub_groq import StubGroq  # noqa: E402
+from amazon_fixtures import AmazonFixtures  # noqa: E402
+from build_index import DEFAULT_OUT  # noqa: E402
+
+
+def start_offline_app(storage: str = DEFAULT_OUT, index_size: int = 2000, llm_ttft: float = 0.2,
+                      llm_tokens_per_s: float = 250.0, amazon_latency: float = 0.15):
+    """Start the stand-ins and serve app.py against them; returns (url, stub, http_server)."""
+    if not os.path.isfile(os.path.join(storage, "docstore.json")):
+        import subprocess
+        subprocess.check_call([
+            sys.executable, os.path.join(HERE, "build_index.py"),
+            "--out", storage, "--size", str(index_size),
+        ])
+
+    stub = StubGroq(ttft=llm_ttft, tokens_per_s=llm_tokens_per_s)
+    groq_server = stub.serve()
+    amazon_server = AmazonFixtures(latency=amazon_latency).serve()
+
+    # must be in place before app.py (and the modules it imports) load
+    os.environ["GROQ_API_KEY"] = "offline-stub"
+    os.environ["GROQ_API_BASE"] = f"http://127.0.0.1:{groq_server.server_address[1]}"
+    os.environ["AMAZON_BASE_URL"] = f"http://127.0.0.1:{amazon_server.server_address[1]}"
+    os.environ["STORAGE_DIR"] = os.path.abspath(storage)
+    os.environ.setdefault("FLASK_SECRET_KEY", "offline-load-test")
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+    from werkzeug.serving import make_server
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    http = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=http.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{http.server_port}", stub, http
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("-c", "--concurrency", type=int, default=4)
+    ap.add_argument("-n", "--requests", type=int, default=100)
+    ap.add_argument("--image-ratio", type=float, default=0.5)
+    ap.add_argument("--storage", default=DEFAULT_OUT, help="index dir; built with build_index.py if missing")
+    ap.add_argument("--index-size", type=int, default=2000)
+    ap.add_argument("--llm-ttft", type=float, default=0.2)
+    ap.add_argument("--llm-tokens-per-s", type=float, default=250.0)
+    ap.add_argument("--amazon-latency", type=float, default=0.15)
+    ap.add_argument("--json")
+    ap.add_argument("--baseline")
+    ap.add_argument("--threshold", type=float, default=0.2)
+    args = ap.parse_args()
+
+    url, stub, http = start_offline_app(
+        args.storage, args.index_size, args.llm_ttft, args.llm_tokens_per_s, args.amazon_latency
+    )
+
+    loadgen.run(url, 1, 2, args.image_ratio, seed=99)  # warm up models
+    calls_before, tokens_before = stub.calls, stub.prompt_tokens
+    report = loadgen.run(url, args.concurrency, args.requests, args.image_ratio)
+    report["llm_calls_per_request"] = (stub.calls - calls_before) / args.requests
+    report["llm_prompt_tokens_per_request"] = (stub.prompt_tokens - tokens_before) / args.requests
+
+    loadgen.print_report(report)
+    print(f"LLM calls/request={report['llm_calls_per_request']:.2f} "
+          f"prompt tokens/request={report['llm_prompt_tokens_per_request']:.0f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    http.shutdown()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = loadgen.regressions(report, json.load(f), args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}")
+        sys.exit(1 if found else 0)
+
+
+if __name__ == "__main__":
+    main()
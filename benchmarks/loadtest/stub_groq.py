@@ -0,0 +1,118 @@
+"""
+Stand-in for the Groq OpenAI-compatible API.
+
+Serves POST /openai/v1/chat/completions and /openai/v1/completions with
+canned replies. Latency is time-to-first-token plus completion tokens
+divided by the token rate, and prompt tokens add a prefill cost, so prompt
+growth shows up in the numbers.
+
+    python benchmarks/loadtest/stub_groq.py --port 9100 --ttft 0.2 --tokens-per-s 250
+"""
+import re
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ANSWER = (
+    "Reviewers generally like it: most mention that it works quickly and feels well made, "
+    "while a few report it running hot or wearing out after several months."
+)
+
+
+def _tokens(text: str) -> int:
+    return (len(text or "") + 3) // 4
+
+
+def _reply(prompt: str) -> str:
+    # Planner (planner_agent.PLAN_TEMPLATE): plan a single RAG lookup
+    if "Reply with ONLY a JSON object" in prompt:
+        q = re.search(r"User request: (.*)", prompt)
+        return json.dumps({"steps": [{"tool": "RAGAnswer", "input": q.group(1) if q else ""}], "answer": ""})
+    # ReAct (zero-shot-react-description): finish in one step
+    if "Action Input" in prompt:
+        return f"Thought: I now know the final answer.\nFinal Answer: {ANSWER}"
+    return ANSWER
+
+
+class StubGroq:
+    def __init__(self, ttft: float = 0.2, tokens_per_s: float = 250.0, prefill_tokens_per_s: float = 5000.0):
+        self.ttft = ttft
+        self.tokens_per_s = tokens_per_s
+        self.prefill_tokens_per_s = prefill_tokens_per_s
+        self.calls = 0
+        self.prompt_tokens = 0
+        self._lock = threading.Lock()
+
+    def complete(self, prompt: str, model: str, chat: bool) -> dict:
+        text = _reply(prompt)
+        p_tok, c_tok = _tokens(prompt), _tokens(text)
+        time.sleep(self.ttft + p_tok / self.prefill_tokens_per_s + c_tok / self.tokens_per_s)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += p_tok
+        usage = {"prompt_tokens": p_tok, "completion_tokens": c_tok, "total_tokens": p_tok + c_tok}
+        if chat:
+            choice = {"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}
+            obj = "chat.completion"
+        else:
+            choice = {"index": 0, "text": text, "finish_reason": "stop"}
+            obj = "text_completion"
+        return {
+            "id": f"stub-{self.calls}",
+            "object": obj,
+            "created": int(time.time()),
+            "model": model,
+            "choices": [choice],
+            "usage": usage,
+        }
+
+    def serve(self, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                if self.path.endswith("/chat/completions"):
+                    prompt = "\n".join(
+                        m.get("content") if isinstance(m.get("content"), str) else json.dumps(m.get("content"))
+                        for m in body.get("messages", [])
+                    )
+                    out = stub.complete(prompt, body.get("model", ""), chat=True)
+                elif self.path.endswith("/completions"):
+                    out = stub.complete(str(body.get("prompt", "")), body.get("model", ""), chat=False)
+                else:
+                    self.send_error(404)
+                    return
+                data = json.dumps(out).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9100)
+    ap.add_argument("--ttft", type=float, default=0.2)
+    ap.add_argument("--tokens-per-s", type=float, default=250.0)
+    ap.add_argument("--prefill-tokens-per-s", type=float, default=5000.0)
+    args = ap.parse_args()
+    server = StubGroq(args.ttft, args.tokens_per_s, args.prefill_tokens_per_s).serve(args.host, args.port)
+    print(f"stand-in Groq on http://{args.host}:{server.server_address[1]} (GROQ_API_BASE)")
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()